@@ -0,0 +1,249 @@
+import copy
+import threading
+import time
+
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from storage import AccountStore
+
+VERSION_ID = "accounts"
+
+class AccountRepository:
+    """
+    In-process, write-through cache in front of AccountStore.
+
+    Every write bumps a version stamp in the meta collection. Reads are served from
+    memory and only go back to Mongo when the stamp shows that another process wrote
+    in the meantime, detected either by a change stream on the stamp or, on servers
+    without change streams, by checking it at most every `check_interval` seconds.
+    """
+
+    def __init__(self, store: AccountStore, meta: Collection, check_interval: float = 5.0):
+        self.store = store
+        self.meta = meta
+        self.check_interval = check_interval
+        self._accounts: dict | None = None
+        self._version = None
+        self._last_check = 0.0
+        self._watching = False
+        self._lock = threading.RLock()
+        self.reads_served = 0
+        self.reads_avoided = 0
+        self.reloads = 0
+        self.version_checks = 0
+        self.invalidations = 0
+
+    def _read_version(self) -> int:
+        doc = self.meta.find_one({"_id": VERSION_ID})
+        return doc["version"] if doc else 0
+
+    def _bump_version(self) -> None:
+        doc = self.meta.find_one_and_update(
+            {"_id": VERSION_ID},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if self._version is not None and doc["version"] == self._version + 1:
+            self._version = doc["version"]
+        else:
+            self.invalidate()
+
+    def _cached_accounts(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            if self._accounts is not None and not self._watching and now - self._last_check >= self.check_interval:
+                self.version_checks += 1
+                self._last_check = now
+                if self._read_version() != self._version:
+                    self.invalidate()
+
+            if self._accounts is None:
+                self._version = self._read_version()
+                self._accounts = self.store.load_all()
+                self._last_check = now
+                self.reloads += 1
+            else:
+                self.reads_avoided += 1
+
+            self.reads_served += 1
+            return self._accounts
+
+    def invalidate(self) -> None:
+        with self._lock:
+            if self._accounts is not None:
+                self.invalidations += 1
+            self._accounts = None
+
+    def start_watch(self) -> bool:
+        """
+        Starts a background change stream on the version stamp.
+
+        Returns:
+            False if the server does not support change streams (polling is used instead)
+        """
+        if self._watching:
+            return True
+        try:
+            stream = self.meta.watch([{"$match": {"documentKey._id": VERSION_ID}}], full_document="updateLookup")
+        except PyMongoError:
+            return False
+
+        def watch():
+            try:
+                with stream:
+                    for change in stream:
+                        version = (change.get("fullDocument") or {}).get("version")
+                        with self._lock:
+                            if version != self._version:
+                                self.invalidate()
+            except PyMongoError as e:
+                print(f"Account change stream stopped: {e}")
+            self._watching = False
+
+        self._watching = True
+        threading.Thread(target=watch, daemon=True, name="account-watch").start()
+        return True
+
+    def load_all(self) -> dict:
+        """
+        Deep copy of every account, for callers that modify them. Read-only callers
+        should use view_all, which is much cheaper.
+        """
+        with self._lock:
+            return copy.deepcopy(self._cached_accounts())
+
+    def view_all(self) -> dict:
+        """
+        Like load_all but without deep copies, for read-only passes over every account.
+
+        Built under the lock, with each account's positions, unmatched_trades and
+        account_history copied one level deep. Writers replace ledgers and history points
+        rather than mutating them, so fills recorded during the pass cannot change the
+        view. Callers must not mutate the returned accounts.
+        """
+        with self._lock:
+            return {
+                name: {
+                    **account,
+                    "positions": dict(account["positions"]),
+                    "unmatched_trades": dict(account["unmatched_trades"]),
+                    "account_history": dict(account["account_history"]),
+                }
+                for name, account in self._cached_accounts().items()
+            }
+
+    def load(self, name: str) -> dict | None:
+        with self._lock:
+            account = self._cached_accounts().get(name)
+            return copy.deepcopy(account) if account is not None else None
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return list(self._cached_accounts())
+
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            return name in self._cached_accounts()
+
+    def held_tickers(self) -> set[str]:
+        with self._lock:
+            return {ticker.upper() for account in self._cached_accounts().values() for ticker in account["unmatched_trades"]}
+
+    def create(self, name: str, account: dict) -> bool:
+        with self._lock:
+            if not self.store.create(name, account):
+                self.invalidate()
+                return False
+            if self._accounts is not None:
+                self._accounts[name] = copy.deepcopy(account)
+                self._accounts[name].setdefault("version", 0)
+            self._bump_version()
+            return True
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            deleted = self.store.delete(name)
+            if self._accounts is not None:
+                self._accounts.pop(name, None)
+            if deleted:
+                self._bump_version()
+            return deleted
+
+    def refresh(self, name: str) -> None:
+        """
+        Re-reads a single account, e.g. after losing an optimistic version check.
+        """
+        with self._lock:
+            if self._accounts is None:
+                return
+            account = self.store.load(name)
+            if account is None:
+                self._accounts.pop(name, None)
+            else:
+                self._accounts[name] = account
+
+    def record_fill(self, name: str, ticker: str, cash_delta: float, position: int | None,
+                    lots: dict | None, pushed_lot: list | None = None,
+                    expected_version: int | None = None) -> bool:
+        with self._lock:
+            if not self.store.record_fill(name, ticker, cash_delta, position, lots, pushed_lot, expected_version):
+                self.refresh(name)
+                return False
+            account = self._accounts.get(name) if self._accounts is not None else None
+            if account is not None:
+                account["cash"] += cash_delta
+                account["version"] += 1
+                if not position:
+                    account["positions"].pop(ticker, None)
+                    account["unmatched_trades"].pop(ticker, None)
+                else:
+                    account["positions"][ticker] = position
+                    account["unmatched_trades"][ticker] = copy.deepcopy(lots)
+            try:
+                self._bump_version()
+            except PyMongoError as e:
+                # the fill is committed, so it must not be reported as failed; only the
+                # stamp other processes watch is missing until the next write
+                print(f"Could not bump account version after filling {name}: {e}")
+                self.invalidate()
+            return True
+
+    def append_history(self, name: str, date: str, point: dict) -> None:
+        with self._lock:
+            self.store.append_history(name, date, point)
+            account = self._accounts.get(name) if self._accounts is not None else None
+            if account is not None:
+                account["account_history"][date] = dict(point)
+            self._bump_version()
+
+    def append_history_many(self, date: str, points: dict[str, dict]) -> list[str]:
+        with self._lock:
+            failed = self.store.append_history_many(date, points)
+            if self._accounts is not None:
+                for name in set(points) - set(failed):
+                    account = self._accounts.get(name)
+                    if account is not None:
+                        account["account_history"].setdefault(date, dict(points[name]))
+            self._bump_version()
+            return failed
+
+    def migrate_legacy(self) -> int:
+        with self._lock:
+            migrated = self.store.migrate_legacy()
+            if migrated:
+                self.invalidate()
+                self._bump_version()
+            return migrated
+
+    def stats(self) -> dict:
+        return {
+            "reads_served": self.reads_served,
+            "reads_avoided": self.reads_avoided,
+            "reloads": self.reloads,
+            "version_checks": self.version_checks,
+            "invalidations": self.invalidations,
+            "change_stream": self._watching,
+        }
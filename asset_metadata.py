@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import NamedTuple
+
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from instrumentation import timed
+from lazy_imports import lazy_import
+from quote_cache import quote_cache
+from ticker_index import ticker_index
+
+yf = lazy_import("yfinance")
+
+METADATA_TTL = float(os.getenv("ASSET_METADATA_TTL", str(30 * 24 * 3600)))
+
+class AssetMetadata(NamedTuple):
+    symbol: str
+    quote_type: str
+    exchange: str | None
+    currency: str | None
+    name: str | None
+    fetched_at: float
+
+class MetadataUnavailable(Exception):
+    """
+    Yahoo returned no quote type for a symbol that does have price history, e.g. a
+    partial or throttled `info` response. Transient: nothing is cached or recorded.
+    """
+
+@timed("data_fetch_seconds", op="asset_metadata")
+def fetch_metadata(ticker: str) -> AssetMetadata | None:
+    """
+    Reads Yahoo's `info` endpoint, the heaviest one, so callers should go through the cache.
+
+    Returns:
+        None if Yahoo has no quote type and no price history for the symbol, i.e. it does not exist
+
+    Raises:
+        MetadataUnavailable: if the quote type is missing but the symbol has price history
+    """
+    asset = yf.Ticker(ticker)
+    info = asset.info
+    quote_type = info.get("quoteType")
+    if quote_type is None:
+        if asset.history(period="5d", interval="1d").empty:
+            return None
+        raise MetadataUnavailable(ticker)
+    return AssetMetadata(
+        symbol=ticker.upper(),
+        quote_type=quote_type,
+        exchange=info.get("exchange"),
+        currency=info.get("currency"),
+        name=info.get("longName") or info.get("shortName"),
+        fetched_at=time.time(),
+    )
+
+class AssetMetadataCache:
+    """
+    Long-lived cache of per-symbol metadata (quote type, exchange, currency, name), which
+    practically never changes. Entries live for `ttl` seconds (ASSET_METADATA_TTL, 30 days
+    by default) in memory and, once attached, in a Mongo collection so they survive
+    restarts and are shared between processes. Lookups also feed the ticker index: a
+    symbol without metadata and without price history is recorded as rejected, while a
+    response that only lacks metadata raises MetadataUnavailable and records nothing.
+    """
+
+    def __init__(self, ttl: float = METADATA_TTL):
+        self.ttl = ttl
+        self.collection: Collection | None = None
+        self._entries: dict[str, AssetMetadata] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+
+    def attach(self, collection: Collection) -> int:
+        """
+        Loads unexpired entries and persists new ones from now on.
+
+        Returns:
+            number of entries loaded
+        """
+        self.collection = collection
+        docs = collection.find({"fetched_at": {"$gte": time.time() - self.ttl}})
+        entries = {
+            doc["_id"]: AssetMetadata(doc["_id"], doc["quote_type"], doc.get("exchange"), doc.get("currency"),
+                                      doc.get("name"), doc["fetched_at"])
+            for doc in docs
+        }
+        with self._lock:
+            self._entries.update(entries)
+        return len(entries)
+
+    def _store(self, metadata: AssetMetadata) -> None:
+        with self._lock:
+            self._entries[metadata.symbol] = metadata
+        if self.collection is None:
+            return
+        fields = metadata._asdict()
+        fields.pop("symbol")
+        try:
+            self.collection.update_one({"_id": metadata.symbol}, {"$set": fields}, upsert=True)
+        except PyMongoError as e:
+            print(f"Could not persist metadata for {metadata.symbol}: {e}")
+
+    def get(self, ticker: str) -> AssetMetadata | None:
+        symbol = ticker.upper()
+        entry = self._entries.get(symbol)
+        if entry is not None and time.time() - entry.fetched_at < self.ttl:
+            self.hits += 1
+            return entry
+        if ticker_index.is_rejected(symbol):
+            return None
+
+        self.misses += 1
+        try:
+            # concurrent misses for one symbol share a single fetch
+            metadata = quote_cache.get_or_fetch(("asset_metadata", symbol), lambda: fetch_metadata(symbol))
+        except Exception:
+            if entry is None:
+                raise
+            self.stale_served += 1
+            return entry
+
+        ticker_index.record(symbol, metadata is not None, metadata.name if metadata is not None else None)
+        if metadata is not None:
+            self._store(metadata)
+        return metadata
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_served": self.stale_served,
+        }
+
+asset_metadata = AssetMetadataCache()
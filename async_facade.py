@@ -0,0 +1,48 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import data
+import order
+from order import Order
+
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "8"))
+
+_executor: ThreadPoolExecutor | None = None
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking")
+    return _executor
+
+def configure(pool_size: int) -> None:
+    global BLOCKING_POOL_SIZE, _executor
+    BLOCKING_POOL_SIZE = pool_size
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a synchronous function on the bounded blocking pool so it does not stall the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+async def get_asset_info(ticker: str, extended_hours: bool = False):
+    return await run_blocking(data.get_asset_info, ticker, extended_hours)
+
+async def get_asset_infos(tickers: list[str], extended_hours: bool = False):
+    return await run_blocking(data.get_asset_infos, tickers, extended_hours)
+
+async def market_order(ticker: str, shares: int, timestamp: datetime) -> Order:
+    return await run_blocking(order.market_order, ticker, shares, timestamp)
@@ -0,0 +1,240 @@
+"""
+Replays stored bars through the live order and ledger code paths
+(order.evaluate_market_order and fills.record_filled_order) for many simulated
+accounts, producing account histories in the same shape as `account_history`.
+
+Also reports fill-path throughput, so it doubles as a load benchmark:
+
+    python backtest.py --tickers AAPL MSFT NVDA --interval 1d --days 365 --accounts 2000
+    python backtest.py --synthetic 250 --accounts 5000 --order-rate 0.2
+"""
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from fills import record_filled_order
+from ledger import position_totals
+import order
+from trading_calendar import EASTERN
+
+SESSION_CLOSE = dt_time(16, 0)
+
+# strategy(step, timestamp, prices, accounts) -> [(account_name, transaction, ticker, shares), ...]
+Strategy = Callable[[int, datetime, dict[str, float], dict[str, dict]], Iterable[tuple[str, str, str, int]]]
+
+class RandomStrategy:
+    """
+    Every account submits an order on each bar with probability `order_rate`,
+    selling part of a random holding a third of the time and buying otherwise.
+    """
+
+    def __init__(self, order_rate: float = 0.05, max_shares: int = 20, seed: int = 0):
+        self.order_rate = order_rate
+        self.max_shares = max_shares
+        self.rng = random.Random(seed)
+
+    def __call__(self, step: int, timestamp: datetime, prices: dict[str, float], accounts: dict[str, dict]):
+        tickers = list(prices)
+        if not tickers:
+            return []
+        orders = []
+        for name, account in accounts.items():
+            if self.rng.random() >= self.order_rate:
+                continue
+            held = [ticker for ticker in account["positions"] if ticker in prices]
+            if held and self.rng.random() < 1 / 3:
+                ticker = self.rng.choice(held)
+                shares = self.rng.randint(1, account["positions"][ticker])
+                orders.append((name, "SELL", ticker, shares))
+            else:
+                orders.append((name, "BUY", self.rng.choice(tickers), self.rng.randint(1, self.max_shares)))
+        return orders
+
+def bar_timestamps(index: pd.DatetimeIndex, interval: str) -> pd.DatetimeIndex:
+    """
+    Times at which a bar's close is known: the session close for daily bars and the
+    bar's own timestamp for intraday bars, like the live 1-minute quote.
+    """
+    if interval == "1d":
+        dates = index.tz_convert(EASTERN).date if index.tz is not None else index.date
+        return pd.DatetimeIndex([EASTERN.localize(datetime.combine(d, SESSION_CLOSE)) for d in dates]).tz_convert(timezone.utc)
+    return index.tz_convert(timezone.utc) if index.tz is not None else index.tz_localize(timezone.utc)
+
+def load_bars(tickers: list[str], interval: str, days: int) -> dict[str, pd.DataFrame]:
+    from bar_store import bar_store
+    return {ticker.upper(): bar_store.get_bars(ticker, interval, timedelta(days=days)) for ticker in tickers}
+
+def synthetic_bars(tickers: list[str], sessions: int, seed: int = 0,
+                   end: datetime | None = None) -> dict[str, pd.DataFrame]:
+    """
+    Geometric random-walk daily bars for offline runs.
+    """
+    rng = np.random.default_rng(seed)
+    end = end or datetime.now(timezone.utc)
+    index = pd.bdate_range(end=end.date(), periods=sessions, tz=EASTERN)
+    bars = {}
+    for ticker in tickers:
+        returns = rng.normal(0.0003, 0.02, sessions)
+        closes = rng.uniform(20, 500) * np.exp(np.cumsum(returns))
+        bars[ticker.upper()] = pd.DataFrame({"Close": closes}, index=index)
+    return bars
+
+class Backtest:
+    def __init__(self, bars: dict[str, pd.DataFrame], accounts: int = 100, starting_cash: float = 100_000.0,
+                 strategy: Strategy | None = None, interval: str = "1d", asset_type: str = "EQUITY",
+                 method: str | None = None):
+        self.interval = interval
+        self.asset_type = asset_type
+        self.method = method
+        self.strategy = strategy or RandomStrategy()
+        self.starting_cash = starting_cash
+
+        closes = {}
+        for ticker, frame in bars.items():
+            if frame.empty:
+                continue
+            series = frame["Close"].astype(float)
+            series.index = bar_timestamps(frame.index, interval)
+            closes[ticker.upper()] = series[~series.index.duplicated(keep="last")]
+        self.closes = pd.DataFrame(closes).sort_index()
+        self.tickers = list(self.closes.columns)
+
+        first_date = self.closes.index[0].date() - timedelta(days=1) if len(self.closes) else None
+        self.accounts = {
+            f"backtest-{i}": {
+                "cash": starting_cash,
+                "positions": {},
+                "unmatched_trades": {},
+                "account_history": {str(first_date): {"value": starting_cash, "return": 0}},
+            }
+            for i in range(accounts)
+        }
+
+        self.orders = 0
+        self.statuses = defaultdict(int)
+        self.evaluate_seconds = 0.0
+        self.record_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def _asset_info(self, ticker: str, last_seen: dict, prev_close: dict) -> tuple:
+        return last_seen.get(ticker, (None, None)), prev_close.get(ticker, (None, None)), self.asset_type
+
+    def _record_history(self, date, last_prices: dict[str, float]) -> None:
+        prices = np.array([last_prices.get(ticker, np.nan) for ticker in self.tickers])
+        columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+        for account in self.accounts.values():
+            value = account["cash"]
+            for ticker, ledger in account["unmatched_trades"].items():
+                shares, _ = position_totals(ledger)
+                value += shares * prices[columns[ticker]]
+            starting_value = list(account["account_history"].values())[0]["value"]
+            account["account_history"][str(date)] = {
+                "value": float(value),
+                "return": round(float((value - starting_value) / starting_value * 100), 2),
+            }
+
+    def run(self) -> "Backtest":
+        start = time.perf_counter()
+        values = self.closes.to_numpy()
+        last_seen: dict[str, tuple[float, datetime]] = {}
+        prev_close: dict[str, tuple[float, datetime]] = {}
+        session_close: dict[str, tuple[float, datetime]] = {}
+        last_prices: dict[str, float] = {}
+        current_date = None
+
+        for step, timestamp in enumerate(self.closes.index):
+            timestamp = timestamp.to_pydatetime()
+            date = timestamp.astimezone(EASTERN).date()
+            if current_date is not None and date != current_date:
+                self._record_history(current_date, last_prices)
+                prev_close = dict(session_close)
+            current_date = date
+
+            prices = {}
+            for column, ticker in enumerate(self.tickers):
+                close = values[step, column]
+                if np.isnan(close):
+                    continue
+                prices[ticker] = float(close)
+                last_seen[ticker] = (float(close), timestamp)
+                session_close[ticker] = (float(close), timestamp)
+                last_prices[ticker] = float(close)
+
+            for account_name, transaction, ticker, shares in self.strategy(step, timestamp, prices, self.accounts):
+                self.orders += 1
+                t0 = time.perf_counter()
+                order_object = order.evaluate_market_order(
+                    ticker, shares, timestamp, self._asset_info(ticker, last_seen, prev_close)
+                )
+                t1 = time.perf_counter()
+                self.evaluate_seconds += t1 - t0
+                status = order_object.status
+                if status == "Filled":
+                    _, status = record_filled_order(self.accounts[account_name], transaction, order_object, self.method)
+                    self.record_seconds += time.perf_counter() - t1
+                self.statuses[status] += 1
+
+        if current_date is not None:
+            self._record_history(current_date, last_prices)
+        self.wall_seconds = time.perf_counter() - start
+        return self
+
+    def histories(self) -> dict[str, dict]:
+        return {name: account["account_history"] for name, account in self.accounts.items()}
+
+    def stats(self) -> dict:
+        fill_seconds = self.evaluate_seconds + self.record_seconds
+        return {
+            "bars": len(self.closes),
+            "tickers": len(self.tickers),
+            "accounts": len(self.accounts),
+            "orders": self.orders,
+            "statuses": dict(self.statuses),
+            "wall_seconds": self.wall_seconds,
+            "orders_per_second": self.orders / self.wall_seconds if self.wall_seconds else 0.0,
+            "fill_path_us": fill_seconds / self.orders * 1e6 if self.orders else 0.0,
+            "evaluate_us": self.evaluate_seconds / self.orders * 1e6 if self.orders else 0.0,
+            "record_us": self.record_seconds / self.statuses["Filled"] * 1e6 if self.statuses["Filled"] else 0.0,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", nargs="+", default=["AAPL", "MSFT", "NVDA", "TSLA"])
+    parser.add_argument("--interval", default="1d", choices=["5m", "1h", "1d"])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--synthetic", type=int, default=0, metavar="SESSIONS",
+                        help="use random-walk daily bars instead of the bar store")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--cash", type=float, default=100_000.0)
+    parser.add_argument("--order-rate", type=float, default=0.05)
+    parser.add_argument("--method", default=None, choices=["FIFO", "LIFO", "AVERAGE"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write account histories to this JSON file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        bars = synthetic_bars(args.tickers, args.synthetic, args.seed)
+        interval = "1d"
+    else:
+        bars = load_bars(args.tickers, args.interval, args.days)
+        interval = args.interval
+
+    backtest = Backtest(bars, accounts=args.accounts, starting_cash=args.cash,
+                        strategy=RandomStrategy(args.order_rate, seed=args.seed),
+                        interval=interval, method=args.method).run()
+    for key, value in backtest.stats().items():
+        print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(backtest.histories(), f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from instrumentation import timer
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+yf = lazy_import("yfinance")
+
+DEFAULT_RETENTION_DAYS = {"5m": 7, "1h": 60, "1d": 400}
+# Yahoo's limits on how far back intraday intervals can be requested
+MAX_LOOKBACK_DAYS = {"1m": 7, "5m": 59, "1h": 729}
+
+class BarStore:
+    """
+    Local close-price store per (ticker, interval, extended hours) kept as memory-mapped
+    .npy columns (UTC nanosecond timestamps and closes) plus a small JSON sidecar.
+
+    Only the tail since the last stored bar is fetched from Yahoo; the last stored bar
+    is re-fetched too since it may still have been forming. Bars older than the
+    interval's retention are dropped on write.
+    """
+
+    def __init__(self, root: str, retention_days: dict | None = None):
+        self.root = root
+        self.retention_days = {**DEFAULT_RETENTION_DAYS, **(retention_days or {})}
+        self._locks: dict[tuple, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self.full_fetches = 0
+        self.tail_fetches = 0
+        self.bars_fetched = 0
+
+    def _lock(self, key: tuple) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _paths(self, ticker: str, interval: str, prepost: bool) -> tuple[str, str, str]:
+        base = os.path.join(self.root, ticker.upper(), f"{interval}{'_prepost' if prepost else ''}")
+        return f"{base}.times.npy", f"{base}.closes.npy", f"{base}.json"
+
+    def _read(self, ticker: str, interval: str, prepost: bool) -> tuple[np.ndarray, np.ndarray, dict | None]:
+        times_path, closes_path, meta_path = self._paths(ticker, interval, prepost)
+        if not os.path.exists(meta_path):
+            return np.empty(0, dtype="int64"), np.empty(0, dtype="float64"), None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return np.load(times_path, mmap_mode="r"), np.load(closes_path, mmap_mode="r"), meta
+
+    def _write(self, ticker: str, interval: str, prepost: bool, times: np.ndarray, closes: np.ndarray,
+               meta: dict) -> None:
+        times_path, closes_path, meta_path = self._paths(ticker, interval, prepost)
+        os.makedirs(os.path.dirname(times_path), exist_ok=True)
+        for path, values in ((times_path, times), (closes_path, closes)):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, values)
+            os.replace(tmp_path, path)
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def _fetch(self, ticker: str, interval: str, prepost: bool, start: datetime) -> tuple[np.ndarray, np.ndarray, str | None]:
+        with timer("data_fetch_seconds", op=f"bars_{interval}"):
+            history = yf.Ticker(ticker).history(start=start, interval=interval, prepost=prepost)
+        self.bars_fetched += len(history)
+        if history.empty:
+            return np.empty(0, dtype="int64"), np.empty(0, dtype="float64"), None
+        index = history.index
+        tz = str(index.tz) if index.tz is not None else None
+        if index.tz is None:
+            index = index.tz_localize(timezone.utc)
+        times = index.tz_convert(timezone.utc).as_unit("ns").asi8
+        return times, history["Close"].to_numpy(dtype="float64"), tz
+
+    def get_bars(self, ticker: str, interval: str, lookback: timedelta, prepost: bool = False) -> pd.DataFrame:
+        """
+        Returns:
+            DataFrame with a "Close" column indexed by bar time in the exchange timezone,
+            covering at least `lookback` (subject to retention and Yahoo's limits)
+        """
+        now = datetime.now(timezone.utc)
+        max_lookback = MAX_LOOKBACK_DAYS.get(interval)
+        if max_lookback is not None:
+            lookback = min(lookback, timedelta(days=max_lookback))
+        retention = self.retention_days.get(interval)
+        if retention is not None:
+            lookback = min(lookback, timedelta(days=retention))
+        window_start = now - lookback
+
+        with self._lock((ticker.upper(), interval, prepost)):
+            times, closes, meta = self._read(ticker, interval, prepost)
+
+            if meta is None or window_start.timestamp() < meta["coverage_start"]:
+                new_times, new_closes, tz = self._fetch(ticker, interval, prepost, window_start)
+                times, closes = new_times, new_closes
+                coverage_start = window_start.timestamp()
+                self.full_fetches += 1
+            else:
+                tail_start = pd.Timestamp(int(times[-1]), tz=timezone.utc).to_pydatetime() if len(times) else window_start
+                new_times, new_closes, tz = self._fetch(ticker, interval, prepost, tail_start)
+                keep = times < new_times[0] if len(new_times) else np.ones(len(times), dtype=bool)
+                times = np.concatenate([times[keep], new_times])
+                closes = np.concatenate([closes[keep], new_closes])
+                coverage_start = meta["coverage_start"]
+                self.tail_fetches += 1
+
+            tz = tz or (meta or {}).get("tz") or "UTC"
+            if retention is not None:
+                cutoff = now - timedelta(days=retention)
+                keep = times >= pd.Timestamp(cutoff).as_unit("ns").value
+                times, closes = times[keep], closes[keep]
+                coverage_start = max(coverage_start, cutoff.timestamp())
+
+            self._write(ticker, interval, prepost, times, closes, {"tz": tz, "coverage_start": coverage_start})
+
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(times), utc=True)).tz_convert(tz)
+        frame = pd.DataFrame({"Close": np.asarray(closes)}, index=index)
+        return frame[frame.index >= pd.Timestamp(window_start)]
+
+    def stats(self) -> dict:
+        return {
+            "full_fetches": self.full_fetches,
+            "tail_fetches": self.tail_fetches,
+            "bars_fetched": self.bars_fetched,
+        }
+
+bar_store = BarStore(
+    os.getenv("BAR_STORE_PATH", os.path.join(os.getenv("FILE_PATH", ""), "bars")),
+    retention_days={
+        interval: int(days)
+        for interval, days in (
+            ("5m", os.getenv("BAR_RETENTION_DAYS_5M")),
+            ("1h", os.getenv("BAR_RETENTION_DAYS_1H")),
+            ("1d", os.getenv("BAR_RETENTION_DAYS_1D")),
+        )
+        if days
+    },
+)
@@ -0,0 +1,412 @@
+"""
+Latency/throughput benchmarks for the bot's hot paths, run against a deterministic
+fake yfinance provider and the local Mongo stand-in so results only reflect our code.
+
+Each benchmark is timed over a range of synthetic portfolio sizes. Results can be
+saved and compared against a previous run to catch regressions before deploy:
+
+    python benchmarks.py --save baseline.json
+    python benchmarks.py --compare baseline.json --threshold 1.25
+    python benchmarks.py --filter valuation record_filled_order
+"""
+import argparse
+import json
+import math
+import random
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+import asset_metadata as asset_metadata_module
+import bar_store as bar_store_module
+import charts
+import data
+import performance
+import sector_performance
+import snapshot
+import valuation
+from account_repository import AccountRepository
+from bar_store import BarStore
+from fills import fill_order, record_filled_order
+from local_mongo import LocalCollection
+from order import Order
+from price_table import price_table
+from quote_cache import quote_cache
+from storage import AccountStore
+from ticker_index import ticker_index
+from trigger_book import ORDER_TYPES, TriggerBook, make_order
+
+EXCHANGE_TZ = "America/New_York"
+INTERVALS = {"1m": timedelta(minutes=1), "5m": timedelta(minutes=5), "1h": timedelta(hours=1), "1d": timedelta(days=1)}
+PERIODS = {"1d": timedelta(days=1), "2d": timedelta(days=2), "5d": timedelta(days=5)}
+# symbols the fake provider does not know, like an invalid ticker on Yahoo
+INVALID_PREFIX = "ZZ"
+
+def _base_price(ticker: str) -> float:
+    return 20 + zlib.crc32(ticker.encode()) % 480
+
+def fake_closes(ticker: str, start: datetime, end: datetime, interval: str) -> pd.Series:
+    """
+    Deterministic closes: the same (ticker, bar time) always has the same price, so
+    overlapping requests (e.g. bar store tail fetches) agree with each other.
+    """
+    step = INTERVALS[interval]
+    index = pd.date_range(pd.Timestamp(start).floor(step), end, freq=step, tz=timezone.utc)
+    phase = zlib.crc32(ticker.encode()) % 1000
+    seconds = index.asi8 / 1e9
+    closes = _base_price(ticker) * (1 + 0.05 * np.sin(seconds / 86400 + phase) + 0.01 * np.sin(seconds / 3600))
+    return pd.Series(closes, index=index.tz_convert(EXCHANGE_TZ))
+
+class FakeTicker:
+    def __init__(self, ticker: str):
+        self.ticker = ticker.upper()
+
+    @property
+    def info(self) -> dict:
+        if self.ticker.startswith(INVALID_PREFIX):
+            return {"trailingPegRatio": None}
+        return {"quoteType": "EQUITY", "exchange": "NMS", "currency": "USD", "longName": self.ticker,
+                "previousClose": _base_price(self.ticker)}
+
+    def history(self, period: str | None = None, interval: str = "1d", start: datetime | None = None,
+                prepost: bool = False, **kwargs) -> pd.DataFrame:
+        if self.ticker.startswith(INVALID_PREFIX):
+            return pd.DataFrame(columns=["Close"], index=pd.DatetimeIndex([], tz=EXCHANGE_TZ), dtype=float)
+        end = datetime.now(timezone.utc)
+        start = start or end - PERIODS[period]
+        return fake_closes(self.ticker, start, end, interval).to_frame("Close")
+
+class FakeYFinance:
+    """
+    Stands in for the subset of the yfinance module used by data.py and bar_store.py.
+    """
+
+    Ticker = FakeTicker
+
+    @staticmethod
+    def download(tickers, period: str = "1d", interval: str = "1d", **kwargs) -> pd.DataFrame:
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        end = datetime.now(timezone.utc)
+        closes = pd.DataFrame({ticker: fake_closes(ticker, end - PERIODS[period], end, interval) for ticker in tickers})
+        closes.columns = pd.MultiIndex.from_product([["Close"], closes.columns], names=["Price", "Ticker"])
+        return closes
+
+def install_fake_provider(bar_root: str) -> None:
+    data.yf = FakeYFinance
+    bar_store_module.yf = FakeYFinance
+    asset_metadata_module.yf = FakeYFinance
+    data.bar_store = BarStore(bar_root)
+
+def reset_caches() -> None:
+    quote_cache.clear()
+    price_table.clear()
+
+def synthetic_tickers(count: int) -> list[str]:
+    return [f"T{i:04d}" for i in range(count)]
+
+def synthetic_account(rng: random.Random, tickers: list[str], positions: int, lots_per_position: int,
+                      history_days: int) -> dict:
+    unmatched_trades = {}
+    for ticker in rng.sample(tickers, positions):
+        lots = [[rng.randint(1, 50), round(rng.uniform(10, 500), 2)] for _ in range(lots_per_position)]
+        unmatched_trades[ticker] = {
+            "method": "FIFO",
+            "shares": sum(shares for shares, _ in lots),
+            "cost": sum(shares * price for shares, price in lots),
+            "lots": lots,
+        }
+    start = datetime(2024, 1, 1).date()
+    value = 100_000.0
+    history = {}
+    for day in range(history_days):
+        value *= 1 + rng.gauss(0.0005, 0.01)
+        history[str(start + timedelta(days=day))] = {"value": value, "return": round((value / 100_000 - 1) * 100, 2)}
+    return {
+        "cash": 100_000.0,
+        "positions": {ticker: ledger["shares"] for ticker, ledger in unmatched_trades.items()},
+        "unmatched_trades": unmatched_trades,
+        "account_history": history,
+    }
+
+def synthetic_accounts(count: int, positions: int, lots_per_position: int = 3, history_days: int = 30,
+                       universe: int = 200, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    tickers = synthetic_tickers(max(universe, positions))
+    return {
+        f"account-{i}": synthetic_account(rng, tickers, positions, lots_per_position, history_days)
+        for i in range(count)
+    }
+
+def make_repository(accounts: dict) -> AccountRepository:
+    store = AccountStore(LocalCollection("accounts"))
+    repository = AccountRepository(store, LocalCollection("meta"), check_interval=math.inf)
+    for name, account in accounts.items():
+        repository.create(name, account)
+    return repository
+
+BENCHMARKS = {}
+
+def benchmark(name: str, params: list):
+    """
+    Registers `setup(param) -> callable`; the returned callable is what gets timed.
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, params)
+        return setup
+    return decorator
+
+@benchmark("evaluate_account_positions", [10, 50, 200])
+def bench_evaluate_account_positions(positions):
+    repository = make_repository(synthetic_accounts(1, positions))
+
+    def run():
+        reset_caches()
+        valuation.value_account(repository.load("account-0"))
+    return run
+
+@benchmark("valuation.value_accounts", [(10, 10), (100, 20), (1000, 20)])
+def bench_value_accounts(param):
+    accounts, positions = param
+    accounts = synthetic_accounts(accounts, positions)
+    tickers = sorted({ticker for account in accounts.values() for ticker in account["unmatched_trades"]})
+    asset_infos = data.get_asset_infos(tickers)
+    return lambda: valuation.value_accounts(accounts, asset_infos, include_positions=False)
+
+@benchmark("record_filled_order", [1, 100, 10_000])
+def bench_record_filled_order(lots):
+    account = synthetic_accounts(1, 1, lots_per_position=lots, universe=1)["account-0"]
+    ticker = next(iter(account["unmatched_trades"]))
+    timestamp = datetime.now(timezone.utc)
+    buy = Order(type="market", ticker=ticker, shares=1, fill_price=100.0, timestamp=timestamp, status="Filled")
+
+    def run():
+        record_filled_order(account, "BUY", buy)
+        record_filled_order(account, "SELL", buy)
+    return run
+
+@benchmark("charts.close_chart", ["5 minute", "hourly", "daily"])
+def bench_close_chart(frequency):
+    def run():
+        reset_caches()
+        charts.close_chart("AAPL", frequency)
+    return run
+
+@benchmark("performance.get_multi_returns_plot", [(2, 30), (5, 365), (20, 365)])
+def bench_multi_returns_plot(param):
+    accounts, days = param
+    histories = {
+        name: account["account_history"]
+        for name, account in synthetic_accounts(accounts, 0, history_days=days).items()
+    }
+    return lambda: performance.get_multi_returns_plot(histories)
+
+@benchmark("load_accounts", [10, 100, 1000])
+def bench_load_accounts(accounts):
+    repository = make_repository(synthetic_accounts(accounts, 10))
+    return lambda: repository.store.load_all()
+
+@benchmark("load_accounts.cached", [10, 100, 1000])
+def bench_load_accounts_cached(accounts):
+    repository = make_repository(synthetic_accounts(accounts, 10))
+    return repository.load_all
+
+@benchmark("load_accounts.view", [10, 100, 1000])
+def bench_view_accounts(accounts):
+    repository = make_repository(synthetic_accounts(accounts, 10))
+    return repository.view_all
+
+@benchmark("save_account.fill_order", [10, 1000])
+def bench_fill_order(accounts):
+    repository = make_repository(synthetic_accounts(accounts, 10))
+    ticker = next(iter(repository.load("account-0")["unmatched_trades"]))
+    order = Order(type="market", ticker=ticker, shares=1, fill_price=100.0,
+                  timestamp=datetime.now(timezone.utc), status="Filled")
+
+    def run():
+        fill_order(repository, "account-0", "BUY", order)
+        fill_order(repository, "account-0", "SELL", order)
+    return run
+
+@benchmark("snapshot.take_snapshot", [10, 100, 1000])
+def bench_take_snapshot(accounts):
+    repository = make_repository(synthetic_accounts(accounts, 10))
+    tickers = sorted(repository.held_tickers())
+    asset_infos = data.get_asset_infos(tickers)
+    days = iter(range(1_000_000))
+
+    def run():
+        # a new date every call so each run appends a point
+        date = str(datetime(2100, 1, 1).date() + timedelta(days=next(days)))
+        snapshot.take_snapshot(repository, date, asset_infos)
+    return run
+
+def synthetic_trigger_entries(count: int, price: float, rng: random.Random, ticker: str = "AAPL") -> list[dict]:
+    timestamp = datetime.now(timezone.utc)
+    entries = []
+    for i in range(count):
+        transaction = rng.choice(["BUY", "SELL"])
+        order_type = rng.choice(ORDER_TYPES)
+        # levels on the side of the price that has not triggered yet
+        below = price * rng.uniform(0.8, 0.999)
+        above = price * rng.uniform(1.001, 1.2)
+        if order_type == "limit":
+            prices = {"limit_price": below if transaction == "BUY" else above}
+        elif order_type == "stop":
+            prices = {"stop_price": above if transaction == "BUY" else below}
+        else:
+            stop = above if transaction == "BUY" else below
+            prices = {"stop_price": stop, "limit_price": stop * (1.01 if transaction == "BUY" else 0.99)}
+        order = make_order(order_type, ticker, 1, timestamp, **prices)
+        entries.append({"_id": i, "account": "account-0", "transaction": transaction, "ticker": ticker,
+                        "submitted_at": timestamp, "triggered": False, "order": order})
+    return entries
+
+@benchmark("trigger_book.on_price", [10_000, 50_000])
+def bench_trigger_book(orders):
+    # one ticker random-walking 0.1% per tick; filled orders are re-placed around the new price
+    rng = random.Random(0)
+    book = TriggerBook()
+    book.load(synthetic_trigger_entries(orders, 100.0, rng))
+    state = {"price": 100.0, "next_id": orders}
+
+    def run():
+        state["price"] *= 1 + rng.gauss(0, 0.001)
+        fills, _ = book.on_price("AAPL", state["price"])
+        for entry in synthetic_trigger_entries(len(fills), state["price"], rng):
+            entry["_id"] = state["next_id"]
+            state["next_id"] += 1
+            book.add(entry)
+    return run
+
+@benchmark("trigger_book.scan_baseline", [10_000, 50_000])
+def bench_trigger_scan(orders):
+    # checking every resting order on each tick, for comparison with the indexed book
+    rng = random.Random(0)
+    entries = synthetic_trigger_entries(orders, 100.0, rng)
+    state = {"price": 100.0}
+
+    def crossed(entry, price):
+        order = entry["order"]
+        buy = entry["transaction"] == "BUY"
+        if order.type == "limit":
+            return price <= order.limit_price if buy else price >= order.limit_price
+        return price >= order.stop_price if buy else price <= order.stop_price
+
+    def run():
+        state["price"] *= 1 + rng.gauss(0, 0.001)
+        return [entry for entry in entries if crossed(entry, state["price"])]
+    return run
+
+@benchmark("data.get_asset_info.invalid", ["first", "known"])
+def bench_invalid_ticker(mode):
+    # "first" pays the upstream lookup every call, "known" is answered by the ticker index
+    tickers = (f"{INVALID_PREFIX}{i}" for i in range(1_000_000))
+    if mode == "first":
+        return lambda: data.get_asset_info(next(tickers))
+    data.get_asset_info("ZZKNOWN")
+    return lambda: data.get_asset_info("ZZKNOWN")
+
+@benchmark("ticker_index.complete", ["A", "MI", "micro"])
+def bench_ticker_complete(prefix):
+    return lambda: ticker_index.complete(prefix)
+
+@benchmark("sector_performance.get_sector_performance", ["Energy", "all"])
+def bench_sector_performance(sector):
+    sector = None if sector == "all" else sector
+
+    def run():
+        reset_caches()
+        sector_performance.get_sector_performance(sector)
+    return run
+
+@benchmark("sector_performance.render_sector_heatmap", ["Energy", "all"])
+def bench_sector_heatmap(sector):
+    sector = None if sector == "all" else sector
+    result = sector_performance.get_sector_performance(sector)
+    return lambda: sector_performance.render_sector_heatmap(result, "Sector Day Change")
+
+def time_callable(func, repeat: int, min_time: float) -> list[float]:
+    """
+    Returns per-call seconds for each repeat, auto-scaling calls per repeat so each
+    repeat runs for at least `min_time`.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+def run(filters: list[str], repeat: int, min_time: float) -> dict:
+    results = {}
+    for name, (setup, params) in BENCHMARKS.items():
+        if filters and not any(f in name for f in filters):
+            continue
+        for param in params:
+            key = f"{name}[{param}]"
+            samples = time_callable(setup(param), repeat, min_time)
+            results[key] = {
+                "min": min(samples),
+                "median": statistics.median(samples),
+                "ops_per_second": 1 / statistics.median(samples),
+            }
+            print(f"{key:<55} median {_format_seconds(results[key]['median']):>10}  "
+                  f"min {_format_seconds(results[key]['min']):>10}  {results[key]['ops_per_second']:>12,.1f} ops/s")
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    ok = True
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        ratio = result["median"] / baseline[key]["median"]
+        if ratio > threshold:
+            ok = False
+            print(f"REGRESSION {key}: {ratio:.2f}x slower than baseline")
+        elif ratio < 1 / threshold:
+            print(f"improved   {key}: {1 / ratio:.2f}x faster than baseline")
+    return ok
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", nargs="*", default=[], help="only run benchmarks whose name contains one of these")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per repeat")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="compare against results saved with --save")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as bar_root:
+        install_fake_provider(bar_root)
+        results = run(args.filter, args.repeat, args.min_time)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            sys.exit(0 if compare(results, json.load(f), args.threshold) else 1)
@@ -1,73 +1,303 @@
+import time
+process_start = time.perf_counter()
+
+import os
+from dotenv import load_dotenv
+
+# modules below read their settings from the environment at import time
+load_dotenv()
+
 import discord
+import asyncio
 from discord.ext import commands, tasks
 from discord import app_commands
 from datetime import datetime, timezone, timedelta
-import os
-from dotenv import load_dotenv
 import order
+import trading_calendar
 from order import Order
-from collections import deque
+from fills import AccountLocks, fill_order
+import valuation
+import snapshot
+from collections import defaultdict
 import data
-import performance
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import pytz
 from math import ceil
-import threading
-from flask import Flask
-import aiohttp
+import traceback
+import math
 from pymongo import MongoClient
-import charts
+from chart_service import chart_service
+import async_facade
+from http_client import HttpClient, SelfPinger
 from sectors import sectors
-
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client[os.getenv("MONGO_DB")]
-collection = db[os.getenv("MONGO_COLLECTION")]
-
-app = Flask("")
-
-@app.route("/")
-def home():
-    return "Bot is alive!"
-
-def run_flask():
-    port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port)
-
-def keep_alive():
-    t = threading.Thread(target=run_flask)
-    t.start()
-
-async def keep_alive_ping():
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(deployment_url) as resp:
-                print(f"Pinged self ({resp.status})")
-    except Exception as e:
-        print(f"Ping failed: {e}")
-
-load_dotenv() 
+from ticker_index import ticker_index
+from asset_metadata import asset_metadata
+from storage import AccountStore
+from account_repository import AccountRepository
+from pending_orders import MongoPendingOrderStore
+from trigger_book import MongoTriggerOrderStore, TriggerBook, make_order
+import price_feed
+from price_table import price_table
+from instrumentation import StartupTimer, metrics
+from lazy_imports import import_timings
+from health_server import HealthServer
+from leader import LeaderElector, LeaderLease, claim_job_run
+from quote_cache import quote_cache
+from bar_store import bar_store
+from bson import ObjectId
+from bson.errors import InvalidId
+
+startup = StartupTimer(process_start)
+startup.mark("imports")
+
+# Mongo is connected after login by connect_storage(), concurrently with the gateway handshake
+client: MongoClient | None = None
+db = None
+collection = None
+account_store: AccountStore | None = None
+pending_order_store: MongoPendingOrderStore | None = None
+trigger_order_store: MongoTriggerOrderStore | None = None
+account_repository: AccountRepository | None = None
+job_runs = None
+leader_elector: LeaderElector | None = None
+storage_task: asyncio.Task | None = None
+account_locks = AccountLocks()
+# resting limit/stop orders, indexed by trigger price; synced from trigger_order_store
+trigger_book = TriggerBook()
 
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 ALLOWED_CHANNEL_ID = int(os.getenv("ALLOWED_CHANNEL_ID", "0"))
 db_file_path = os.getenv("FILE_PATH", "")
 db_path = os.path.join(db_file_path, "db.json")
 deployment_url = os.getenv("DEPLOYMENT_URL", "")
+keep_alive_ping_interval = int(os.getenv("KEEP_ALIVE_PING_INTERVAL", "300"))
+ready_max_pending_orders = int(os.getenv("READY_MAX_PENDING_ORDERS", "0"))
+# Discord sharding: SHARD_COUNT total shards, SHARD_IDS the comma-separated shards run by this process
+shard_count = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+shard_ids = [int(shard_id) for shard_id in os.getenv("SHARD_IDS").split(",")] if os.getenv("SHARD_IDS") else None
+leader_lease_ttl = float(os.getenv("LEADER_LEASE_TTL", "15"))
+trigger_check_interval = float(os.getenv("TRIGGER_CHECK_INTERVAL", "15"))
+storage_retry_delay = float(os.getenv("STORAGE_RETRY_DELAY", "1"))
+storage_retry_max_delay = float(os.getenv("STORAGE_RETRY_MAX_DELAY", "60"))
 
 not_enough_funds_message = os.getenv("NOT_ENOUGH_FUNDS_MESSAGE", "")
 
+http_client = HttpClient(limit=int(os.getenv("HTTP_POOL_SIZE", "20")))
+self_pinger = SelfPinger(http_client, deployment_url, min_interval=keep_alive_ping_interval / 2)
+
+def tradable_now(tickers) -> list[str]:
+    # outside exchange sessions only around-the-clock assets can move, so stocks are not fetched
+    if trading_calendar.is_open(datetime.now(timezone.utc)):
+        return list(tickers)
+    return [ticker for ticker in tickers if data.get_asset_type(ticker) not in trading_calendar.SESSION_ASSET_TYPES]
+
+def get_watchlist() -> list[str]:
+    return tradable_now(account_repository.held_tickers()
+                        | {ticker.upper() for ticker in pending_order_store.tickers()}
+                        | {ticker.upper() for ticker in trigger_order_store.tickers()})
+
+price_source = price_feed.make_source(os.getenv("PRICE_INGEST", "off"))
+price_ingestor = (
+    price_feed.PriceIngestor(price_source, price_table, get_watchlist, interval=price_feed.PRICE_INGEST_INTERVAL)
+    if price_source is not None else None
+)
+
+metrics.register_collector("startup", startup.stats)
+metrics.register_collector("lazy_import", lambda: {f"{name.replace('.', '_')}_ms": seconds * 1000 for name, seconds in import_timings.items()})
+metrics.register_collector("quote_cache", quote_cache.stats)
+metrics.register_collector("chart_service", chart_service.stats)
+metrics.register_collector("bar_store", bar_store.stats)
+metrics.register_collector("price_table", price_table.stats)
+metrics.register_collector("trigger_book", trigger_book.stats)
+metrics.register_collector("ticker_index", ticker_index.stats)
+metrics.register_collector("asset_metadata", asset_metadata.stats)
+if price_ingestor is not None:
+    metrics.register_collector("price_ingest", price_ingestor.stats)
+
+health_server = HealthServer(metrics, port=int(os.getenv("PORT", "5000")))
+
+def connect_storage() -> None:
+    global client, db, collection, account_store, pending_order_store, account_repository, job_runs, leader_elector
+    global trigger_order_store
+    with startup.phase("mongo_connect"):
+        client = MongoClient(os.getenv("MONGO_URI"))
+        client.admin.command("ping")
+    db = client[os.getenv("MONGO_DB")]
+    collection = db[os.getenv("MONGO_COLLECTION")]
+    account_store = AccountStore(db[os.getenv("MONGO_ACCOUNTS_COLLECTION", "accounts")], legacy=collection)
+    pending_order_store = MongoPendingOrderStore(db[os.getenv("MONGO_PENDING_ORDERS_COLLECTION", "pending_orders")])
+    trigger_order_store = MongoTriggerOrderStore(db[os.getenv("MONGO_TRIGGER_ORDERS_COLLECTION", "trigger_orders")])
+    account_repository = AccountRepository(
+        account_store,
+        db[os.getenv("MONGO_META_COLLECTION", "meta")],
+        check_interval=float(os.getenv("ACCOUNT_CACHE_CHECK_INTERVAL", "5")),
+    )
+    metrics.register_collector("account_cache", account_repository.stats)
+    # scheduled jobs run only in the process holding this lease
+    job_runs = db[os.getenv("MONGO_JOB_RUNS_COLLECTION", "job_runs")]
+    leader_elector = LeaderElector(LeaderLease(db[os.getenv("MONGO_LEASES_COLLECTION", "leases")], "scheduler",
+                                               ttl=leader_lease_ttl))
+    metrics.register_collector("leader", leader_elector.stats)
+
+    with startup.phase("migrate_legacy"):
+        migrated = account_repository.migrate_legacy()
+    if migrated:
+        print(f"Migrated {migrated} accounts to per-account documents")
+    if not account_repository.start_watch():
+        print("Change streams unavailable, polling account version stamp")
+    with startup.phase("ensure_indexes"):
+        pending_order_store.ensure_indexes()
+        trigger_order_store.ensure_indexes()
+    with startup.phase("ticker_index_load"):
+        ticker_index.attach(db[os.getenv("MONGO_TICKERS_COLLECTION", "tickers")])
+        asset_metadata.attach(db[os.getenv("MONGO_ASSET_METADATA_COLLECTION", "asset_metadata")])
+    with startup.phase("trigger_book_load"):
+        trigger_book.load(trigger_order_store.all())
+    with startup.phase("account_cache_warm"):
+        account_repository.names()
+
+async def connect_storage_with_retry() -> None:
+    """
+    Keeps calling connect_storage with exponential backoff until it succeeds, so a Mongo
+    outage at startup delays readiness instead of leaving the bot permanently broken.
+    """
+    global client
+    delay = storage_retry_delay
+    attempt = 1
+    while True:
+        try:
+            await async_facade.run_blocking(connect_storage)
+            return
+        except Exception as e:
+            metrics.inc("storage_connect_errors")
+            print(f"Storage connection failed (attempt {attempt}), retrying in {delay:g}s: {e!r}")
+            if client is not None:
+                client.close()
+                client = None
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, storage_retry_max_delay)
+        attempt += 1
+
+def storage_ready() -> bool:
+    # connect_storage_with_retry only finishes once connected
+    return storage_task is not None and storage_task.done() and not storage_task.cancelled()
+
+async def wait_for_storage() -> None:
+    await asyncio.shield(storage_task)
+
+class BrokerTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # commands can arrive right after the gateway is up, before Mongo finished connecting;
+        # answer right away rather than wait past Discord's 3s response window
+        if storage_ready() or interaction.type == discord.InteractionType.autocomplete:
+            return True
+        await interaction.response.send_message("The bot is starting up, please try again in a moment.",
+                                                ephemeral=True)
+        return False
+
+class BrokerBot(commands.AutoShardedBot):
+    async def setup_hook(self):
+        global storage_task
+        startup.mark("login")
+        storage_task = asyncio.create_task(connect_storage_with_retry())
+        await health_server.start()
+
+    async def close(self):
+        if scheduler.running:
+            scheduler.shutdown(wait=False)
+        if price_ingestor is not None:
+            await price_ingestor.stop()
+        if leader_elector is not None:
+            await leader_elector.stop()
+        await health_server.stop()
+        await http_client.close()
+        await super().close()
+        chart_service.shutdown()
+        async_facade.shutdown()
+
 intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = BrokerBot(command_prefix="!", intents=intents, tree_cls=BrokerTree, shard_count=shard_count, shard_ids=shard_ids)
 scheduler = AsyncIOScheduler(timezone=pytz.UTC)
 
-reconciliation_orders = []
+async def discord_ready():
+    connected = bot.is_ready() and not bot.is_closed()
+    return connected, {"latency_ms": round(bot.latency * 1000) if connected else None}
+
+async def mongo_ready():
+    if client is None:
+        return False, "not connected"
+    await async_facade.run_blocking(client.admin.command, "ping")
+    return True, "ping ok"
+
+async def scheduler_ready():
+    return scheduler.running, {"jobs": len(scheduler.get_jobs()) if scheduler.running else 0}
+
+async def pending_backlog_ready():
+    # READY_MAX_PENDING_ORDERS=0 only reports the backlog without failing readiness
+    if pending_order_store is None:
+        return False, "not connected"
+    backlog = await async_facade.run_blocking(pending_order_store.count)
+    return not ready_max_pending_orders or backlog <= ready_max_pending_orders, {"pending_orders": backlog}
+
+health_server.add_check("discord", discord_ready)
+health_server.add_check("mongo", mongo_ready)
+health_server.add_check("scheduler", scheduler_ready)
+health_server.add_check("pending_backlog", pending_backlog_ready)
+
+async def leader_status():
+    # informational: standbys are ready too
+    if leader_elector is None:
+        return True, {"leader": False}
+    return True, {"leader": leader_elector.is_leader, "term": leader_elector.lease.term, "shards": bot.shard_ids}
+
+health_server.add_check("leader", leader_status)
+
 
 @bot.event
 async def on_ready():
-    await bot.tree.sync()
+    startup.mark("gateway_ready")
+    await wait_for_storage()
+    startup.mark("storage_ready")
+    await http_client.start()
+    if bot.shard_ids is None or 0 in bot.shard_ids:
+        with startup.phase("tree_sync"):
+            await bot.tree.sync()
+    leader_elector.start()
+    if price_ingestor is not None:
+        price_ingestor.start()
     if not process_reconciliation_orders.is_running():
         process_reconciliation_orders.start()
-    scheduler.start()
+    if not process_trigger_orders.is_running():
+        process_trigger_orders.start()
+    if not scheduler.running:
+        scheduler.add_job(keep_alive_ping, "interval", seconds=keep_alive_ping_interval, id="keep_alive_ping",
+                          max_instances=1, coalesce=True, replace_existing=True)
+        scheduler.start()
+    startup.mark("on_ready")
     print(f"✅ Logged in as {bot.user} (ID: {bot.user.id})")
+    print(startup.report())
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    # measured from interaction creation, so it includes Discord's delivery latency
+    elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    metrics.observe("command_seconds", elapsed, command=command.name)
+
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    command = interaction.command.name if interaction.command else "unknown"
+    metrics.inc("command_errors", command=command)
+    print(f"Command {command} failed: {error!r}")
+    traceback.print_exception(error)
+
+async def ticker_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    return [
+        app_commands.Choice(name=f"{symbol} - {name}"[:100], value=symbol)
+        for symbol, name in ticker_index.complete(current)
+    ]
+
+async def keep_alive_ping():
+    await self_pinger.ping()
 
 def get_current_date():
     now_utc = datetime.now(timezone.utc)
@@ -82,198 +312,245 @@ def get_current_time():
     now_utc = datetime.now(timezone.utc)
     return now_utc
 
-def load_accounts() -> dict:
-    doc = collection.find_one()
+def view_accounts() -> dict:
+    """
+    Read-only view of every account, see AccountRepository.view_all. Use load_account
+    for an account that is going to be modified.
+    """
+    return account_repository.view_all()
 
-    if doc and "db" in doc:
-        return doc["db"]
-    else:
-        return {}
+def load_account(account_name: str) -> dict | None:
+    return account_repository.load(account_name)
 
 def get_account_names() -> list[str]:
-    accounts = load_accounts()
-    return accounts.keys()
-
-def save_accounts(data: dict) -> None:
-    collection.update_one(
-        {},
-        {"$set": {"db": data}},
-        upsert=True
-    )
+    return account_repository.names()
 
 def evaluate_account_positions(account_name: str) -> tuple[dict, dict]:
-    if account_name not in get_account_names():
+    account = load_account(account_name)
+    if account is None:
         return None, None
-    
-    account = load_accounts()[account_name]
-    account_info = {"cash": account["cash"]}
-    amount_invested = 0
-    
-    positions_info = {}
-    unmatched_trades = account["unmatched_trades"]
-    for ticker in unmatched_trades:
-        total_shares = 0
-        total_cost = 0
-        for unmatched_trade in unmatched_trades[ticker]:
-            total_shares += unmatched_trade["shares"]
-            total_cost += unmatched_trade["shares"] * unmatched_trade["price"]
-        
-        cost_basis = total_cost / total_shares
-
-        current, prev = data.get_asset_info(ticker)[:2]
-        current_price = current[0]
-        prev_price = prev[0]
-        if prev_price is None:
-            prev_price = current_price
-
-        total_value = current_price * total_shares
-        prev_value = prev_price * total_shares
-        amount_invested += total_value
-        pnl = total_value - total_cost
-        day_pnl = total_value - prev_value
-        day_change = day_pnl / prev_value * 100
-        
-        positions_info[ticker] = {
-            "shares": total_shares,
-            "price": current_price,
-            "cost_basis": cost_basis,
-            "total_value": total_value,
-            "pnl": pnl,
-            "day_pnl": day_pnl,
-            "day_change": day_change,
-        }
-
-    account_info["invested"] = amount_invested
-    current_value = amount_invested + account_info["cash"]
-    previous_value = list(account["account_history"].values())[-1]["value"]
-
-    account_info["account_value"] = current_value
-    day_pnl = current_value - previous_value
-    day_change = day_pnl / previous_value * 100
-
-    account_info["day_pnl"] = day_pnl
-    account_info["day_change"] = day_change
-
-    return positions_info, account_info   
-
-def record_filled_order(account: dict, transaction: str, order: Order) -> tuple[dict, str]:
-    shares = order.shares if transaction == "BUY" else -order.shares
-    total_cost = shares * order.fill_price
-    trade = {
-        "shares": shares,
-        "price": order.fill_price
-    }
+    return valuation.value_account(account)
+
+def evaluate_all_accounts() -> dict[str, tuple[dict, dict]]:
+    return valuation.value_accounts(view_accounts(), include_positions=False)
+
+def fill_message(account_name: str, transaction: str, order_object: Order, status: str) -> str:
+    if status == "Not enough funds":
+        return f"Not enough account funds in {account_name}"
+    elif status == "Filled":
+        label = order_object.type.replace("_", "-").capitalize()
+        return f"😎 {label} order filled: {transaction} {order_object.shares} shares of {order_object.ticker} at ${order_object.fill_price:,.2f} for {account_name}."
+    elif status == "Conflict":
+        return f"Order for {account_name} could not be applied due to concurrent updates, please retry."
+    return f"Account `{account_name}` does not exist."
+
+def evaluate_pending_orders() -> tuple[list[tuple], list[dict]]:
+    """
+    Evaluates every pending order against one batched quote fetch for all their tickers,
+    so a long queue does not take over the blocking pool. A ticker that gets no price is
+    only rejected if the ticker index knows it is invalid; otherwise its orders wait for
+    the next round, as a failed download also leaves prices empty.
+
+    Returns:
+        rejections: (entry id, notice) for orders that were rejected
+        fills: pending entries with their filled `order_object`
+    """
+    pending = pending_order_store.all()
+    if not pending:
+        return [], []
+
+    tickers = sorted({entry["ticker"] for entry in pending})
+    asset_info_by_ticker = data.asset_info_tuples(data.get_asset_infos(tickers, extended_hours=True))
+
+    account_names = set(get_account_names())
+    rejections = []
+    fills = []
+
+    for entry in pending:
+        account_name = entry["account"]
+        order_info = entry["order"]
+
+        if account_name not in account_names:
+            rejections.append((entry["_id"], f"Account `{account_name}` does not exist."))
+            continue
 
-    if transaction == "BUY" and account["cash"] < total_cost:
-        return account, "Not enough funds"
-    
-    account["cash"] -= total_cost
+        asset_info = asset_info_by_ticker.get(entry["ticker"])
+        if asset_info is None:
+            if ticker_index.is_rejected(entry["ticker"]):
+                rejections.append((entry["_id"], f"Ticker `{order_info.ticker}` invalid."))
+            continue
 
-    if order.ticker not in account["positions"]:
-        account["positions"][order.ticker] = shares
-        account["unmatched_trades"][order.ticker] = [trade]
-    else:
-        if transaction == "BUY" and account["positions"][order.ticker] > 0:
-            account["positions"][order.ticker] += shares
-            account["unmatched_trades"][order.ticker].append(trade)
-        elif transaction == "BUY" and account["positions"][order.ticker] < 0:
-            updated_shares = account["positions"][order.ticker] + shares
-            account["positions"][order.ticker] = updated_shares
-            if updated_shares > 0:
-                account["unmatched_trades"][order.ticker] = [{
-                    "shares": updated_shares,
-                    "price": order.fill_price
-                }]
-            elif updated_shares == 0:
-                del account["positions"][order.ticker]
-                del account["unmatched_trades"][order.ticker]
-            else:
-                unmatched_trades = deque(account["unmatched_trades"][order.ticker])
-                shares_remaining = shares
-                while shares_remaining > 0:
-                    if abs(unmatched_trades[0]["shares"]) > shares_remaining:
-                        unmatched_trades[0]["shares"] += shares_remaining
-                        shares_remaining = 0
-                    else:
-                        shares_remaining += unmatched_trades[0]["shares"]
-                        unmatched_trades.popleft()
-                account["unmatched_trades"][order.ticker] = list(unmatched_trades)
-        elif transaction == "SELL" and account["positions"][order.ticker] < 0:
-            account["positions"][order.ticker] += shares
-            account["unmatched_trades"][order.ticker].append(trade)
-        elif transaction == "SELL" and account["positions"][order.ticker] > 0:
-            updated_shares = account["positions"][order.ticker] + shares
-            account["positions"][order.ticker] = updated_shares
-            if updated_shares < 0:
-                account["positions"][order.ticker] = updated_shares
-                account["unmatched_trades"][order.ticker] = [{
-                    "shares": updated_shares,
-                    "price": order.fill_price
-                }]
-            elif updated_shares == 0:
-                del account["positions"][order.ticker]
-                del account["unmatched_trades"][order.ticker]
-            else:
-                unmatched_trades = deque(account["unmatched_trades"][order.ticker])
-                shares_remaining = shares
-                while shares_remaining < 0:
-                    if unmatched_trades[0]["shares"] > abs(shares_remaining):
-                        unmatched_trades[0]["shares"] += shares_remaining
-                        shares_remaining = 0
-                    else:
-                        shares_remaining += unmatched_trades[0]["shares"]
-                        unmatched_trades.popleft()
-                account["unmatched_trades"][order.ticker] = list(unmatched_trades)
-    return account, "Filled"    
+        order_object = order.evaluate_market_order(order_info.ticker, order_info.shares, order_info.timestamp, asset_info)
 
-@tasks.loop(minutes=1)
-async def process_reconciliation_orders():
-    global reconciliation_orders
+        if order_object.status == "Reconciliation":
+            continue
+        elif order_object.status == "Filled":
+            fills.append({**entry, "order_object": order_object})
+            continue
 
-    channel = bot.get_channel(ALLOWED_CHANNEL_ID)
-    unfilled_reconciliation_orders = []
+        if order_object.status == "Invalid ticker":
+            rejections.append((entry["_id"], f"Ticker `{order_object.ticker}` invalid."))
+        elif order_object.status == "Market is closed":
+            rejections.append((entry["_id"], "Market is closed"))
 
-    if not reconciliation_orders:
-        return
-    
-    for reconciliation_order in reconciliation_orders:
-        account_name = reconciliation_order["account"]
-        order_info = reconciliation_order["order"]
-        transaction = reconciliation_order["transaction"]
-        
-        if account_name not in get_account_names():
-            await channel.send(f"Account `{account_name}` does not exist.")
-            continue
+    return rejections, fills
 
-        accounts = load_accounts()
-        account = accounts[account_name]
-        order_object = order.market_order(order_info.ticker, order_info.shares, order_info.timestamp)
+def claim_rejections(rejections: list[tuple]) -> list[str]:
+    return [message for entry_id, message in rejections if pending_order_store.claim(entry_id)]
 
-        if order_object.status == "Invalid ticker":
-            await channel.send(f"Ticker `{order_object.ticker}` invalid.")
+def fill_pending_orders(store, account_name: str, fills: list[dict]) -> list[str]:
+    messages = []
+    for entry in fills:
+        # claiming removes the entry, so another process can never fill it a second time
+        if not store.claim(entry["_id"]):
             continue
-        elif order_object.status == "Market is closed":
-            await channel.send(f"Market is closed")
+        try:
+            status = fill_order(account_repository, account_name, entry["transaction"], entry["order_object"])
+        except Exception as e:
+            # nothing was applied, so put the order back to be retried on the next round
+            metrics.inc("order_fill_errors")
+            print(f"Filling order {entry['_id']} for {account_name} failed, restoring it: {e!r}")
+            try:
+                store.restore(entry)
+            except Exception as restore_error:
+                print(f"Could not restore order {entry['_id']} for {account_name}: {restore_error!r}")
+                messages.append(f"Order for {entry['transaction']} {entry['order'].shares} {entry['ticker']} in "
+                                f"{account_name} could not be filled and was dropped, please place it again.")
             continue
-        elif order_object.status == "Reconciliation":
-            unfilled_reconciliation_orders.append({
-                "account": account_name,
-                "transaction": transaction,
-                "order": order_object
-            })
+        messages.append(fill_message(account_name, entry["transaction"], entry["order_object"], status))
+    return messages
+
+async def fill_account_orders(store, account_name: str, fills: list[dict]) -> list[str]:
+    async with account_locks(account_name):
+        return await async_facade.run_blocking(fill_pending_orders, store, account_name, fills)
+
+async def send_lines(channel, lines: list[str], limit: int = 2000) -> None:
+    chunk = ""
+    for line in lines:
+        if chunk and len(chunk) + len(line) + 1 > limit:
+            await channel.send(chunk)
+            chunk = ""
+        chunk += line + "\n"
+    if chunk:
+        await channel.send(chunk)
+
+async def get_report_channel():
+    # with sharding across processes the channel's guild may be served by another process
+    return bot.get_channel(ALLOWED_CHANNEL_ID) or await bot.fetch_channel(ALLOWED_CHANNEL_ID)
+
+async def run_order_loop(loop_name: str, iteration) -> None:
+    """
+    Runs one iteration of an order loop on the leader. An exception escaping a tasks.loop
+    iteration stops the loop for good, so errors (e.g. from yfinance or Mongo) are logged
+    and counted and the loop carries on at its next interval.
+    """
+    if leader_elector is None or not leader_elector.is_leader:
+        return
+    try:
+        await iteration()
+    except Exception as e:
+        metrics.inc("order_loop_errors", loop=loop_name)
+        print(f"{loop_name} iteration failed: {e!r}")
+        traceback.print_exception(e)
+
+async def reconcile_pending_orders():
+    rejections, fills = await async_facade.run_blocking(evaluate_pending_orders)
+    fills_by_account = defaultdict(list)
+    for entry in fills:
+        fills_by_account[entry["account"]].append(entry)
+
+    messages = await async_facade.run_blocking(claim_rejections, rejections)
+    fill_results = await asyncio.gather(*(
+        fill_account_orders(pending_order_store, account_name, fills) for account_name, fills in fills_by_account.items()
+    ))
+    messages.extend(message for account_messages in fill_results for message in account_messages)
+
+    if messages:
+        await send_lines(await get_report_channel(), messages)
+
+@tasks.loop(minutes=1)
+async def process_reconciliation_orders():
+    await run_order_loop("process_reconciliation_orders", reconcile_pending_orders)
+
+def describe_trigger_order(entry: dict) -> str:
+    order_object = entry["order"]
+    prices = []
+    if order_object.stop_price is not None:
+        prices.append(f"stop ${order_object.stop_price:,.2f}")
+    if order_object.limit_price is not None:
+        prices.append(f"limit ${order_object.limit_price:,.2f}")
+    label = order_object.type.replace("_", "-").capitalize()
+    triggered = " (triggered)" if entry["triggered"] else ""
+    return (f"`{entry['_id']}` {label} {entry['transaction']} {order_object.shares} {order_object.ticker} "
+            f"{', '.join(prices)}{triggered}")
+
+def sync_trigger_book() -> tuple[int, int]:
+    """
+    Brings the in-memory book in line with the store by id: loads every stored order the
+    book is missing, whether placed by another process or put back after a failed fill,
+    and drops orders that were cancelled or filled elsewhere, e.g. by a cancel handled on
+    another shard, so their tickers are no longer polled.
+
+    Returns:
+        (added, removed)
+    """
+    # every order in the book was stored before it was added, so one missing from the
+    # store now was claimed since; orders added after this snapshot are left alone
+    book_ids = set(trigger_book.ids())
+    live_ids = trigger_order_store.ids()
+    removed = sum(trigger_book.remove(entry_id) is not None for entry_id in book_ids - live_ids)
+    added = trigger_book.load(trigger_order_store.by_ids(live_ids - book_ids))
+    return added, removed
+
+def evaluate_trigger_orders() -> tuple[list[dict], list[str]]:
+    """
+    Prices every ticker with resting orders in one batched fetch and applies each price to
+    the trigger book.
+
+    Returns:
+        fills: triggered entries with their filled `order_object`
+        messages: notices for stop-limit orders whose stop triggered
+    """
+    sync_trigger_book()
+    tickers = tradable_now(trigger_book.tickers())
+    if not tickers:
+        return [], []
+
+    asset_infos = data.get_asset_infos(tickers, extended_hours=True)
+    now = get_current_time()
+    fills = []
+    activated = []
+    messages = []
+    for ticker, price, timestamp in zip(asset_infos.index, asset_infos["price"], asset_infos["timestamp"]):
+        if math.isnan(price) or not order.is_market_open(data.get_asset_type(ticker), now, timestamp):
             continue
-        elif order_object.status == "Filled":
-            updated_account, status = record_filled_order(account, transaction, order_object)
-            if status == "Not enough funds":
-                await channel.send(f"Not enough account funds in {account_name}")
-            elif status == "Filled":
-                accounts[account_name] = updated_account
-                save_accounts(accounts)
-                await channel.send(
-                    f"😎 Market order filled: {transaction} {order_info.shares} shares of {order_info.ticker} at ${order_object.fill_price:,.2f} for {account_name}.",
-                )
-
-    reconciliation_orders = unfilled_reconciliation_orders
+        ticker_fills, ticker_activated = trigger_book.on_price(ticker, float(price))
+        for entry in ticker_fills:
+            order_object = entry["order"].model_copy(update={"fill_price": float(price), "timestamp": now, "status": "Filled"})
+            fills.append({**entry, "order_object": order_object})
+        for entry in ticker_activated:
+            activated.append(entry["_id"])
+            messages.append(f"Stop triggered at ${price:,.2f} for {entry['account']}: {describe_trigger_order(entry)}")
+
+    trigger_order_store.mark_triggered(activated)
+    return fills, messages
+
+async def fill_trigger_orders():
+    fills, messages = await async_facade.run_blocking(evaluate_trigger_orders)
+    fills_by_account = defaultdict(list)
+    for entry in fills:
+        fills_by_account[entry["account"]].append(entry)
+    fill_results = await asyncio.gather(*(
+        fill_account_orders(trigger_order_store, account_name, fills) for account_name, fills in fills_by_account.items()
+    ))
+    messages.extend(message for account_messages in fill_results for message in account_messages)
+
+    if messages:
+        await send_lines(await get_report_channel(), messages)
+
+@tasks.loop(seconds=trigger_check_interval)
+async def process_trigger_orders():
+    await run_order_loop("process_trigger_orders", fill_trigger_orders)
 
 @bot.tree.command(name="market_order", description="Enter a market order")
 @app_commands.describe(
@@ -286,21 +563,19 @@ async def process_reconciliation_orders():
     app_commands.Choice(name="BUY", value="BUY"),
     app_commands.Choice(name="SELL", value="SELL")
 ])
+@app_commands.autocomplete(ticker=ticker_autocomplete)
 async def execute_market_order(interaction: discord.Interaction, account_name: str, 
                                transaction: str, ticker: str, shares: int):
-    global reconciliation_orders
-
-    await keep_alive_ping()
-
-    if account_name not in get_account_names():
+    if account_name not in await async_facade.run_blocking(get_account_names):
         await interaction.response.send_message(f"Account `{account_name}` does not exist.")
         return
+    if ticker_index.is_rejected(ticker):
+        await interaction.response.send_message(f"Ticker `{ticker}` invalid.")
+        return
     
     await interaction.response.defer(thinking=True)  
     
-    accounts = load_accounts()
-    account = accounts[account_name]
-    order_object = order.market_order(ticker, shares, get_current_time())
+    order_object = await async_facade.market_order(ticker, shares, get_current_time())
 
     if order_object.status == "Invalid ticker":
         await interaction.followup.send(f"Ticker `{ticker}` invalid.")
@@ -309,33 +584,88 @@ async def execute_market_order(interaction: discord.Interaction, account_name: s
         await interaction.followup.send(f"Market is closed")
         return
     elif order_object.status == "Reconciliation":
-        reconciliation_orders.append({
-            "account": account_name,
-            "transaction": transaction,
-            "order": order_object
-        })
+        await async_facade.run_blocking(pending_order_store.add, account_name, transaction, order_object)
         await interaction.followup.send(f"Order pending")
         return
     elif order_object.status == "Filled":
-        updated_account, status = record_filled_order(account, transaction, order_object)
-        if status == "Not enough funds":
-            await interaction.followup.send(f"Not enough account funds in {account_name}")
-            return 
-        elif status == "Filled":
-            accounts[account_name] = updated_account
-            save_accounts(accounts)
-            await interaction.followup.send(
-                f"😎 Market order filled: {transaction} {shares} shares of {ticker} at ${order_object.fill_price:,.2f} for {account_name}.",
-            )
+        async with account_locks(account_name):
+            status = await async_facade.run_blocking(fill_order, account_repository, account_name, transaction, order_object)
+        await interaction.followup.send(fill_message(account_name, transaction, order_object, status))
+
+@bot.tree.command(name="place_order", description="Place a limit, stop or stop-limit order")
+@app_commands.describe(
+    account_name="Account name",
+    transaction="Transaction type",
+    ticker="Stock ticker",
+    shares="Number of shares",
+    order_type="Order type",
+    limit_price="Limit price (limit and stop-limit orders)",
+    stop_price="Stop price (stop and stop-limit orders)"
+)
+@app_commands.choices(transaction=[
+    app_commands.Choice(name="BUY", value="BUY"),
+    app_commands.Choice(name="SELL", value="SELL")
+], order_type=[
+    app_commands.Choice(name="Limit", value="limit"),
+    app_commands.Choice(name="Stop", value="stop"),
+    app_commands.Choice(name="Stop-limit", value="stop_limit")
+])
+@app_commands.autocomplete(ticker=ticker_autocomplete)
+async def place_order(interaction: discord.Interaction, account_name: str, transaction: str, ticker: str,
+                      shares: int, order_type: str, limit_price: float | None = None, stop_price: float | None = None):
+    if account_name not in await async_facade.run_blocking(get_account_names):
+        await interaction.response.send_message(f"Account `{account_name}` does not exist.")
+        return
+    if ticker_index.is_rejected(ticker):
+        await interaction.response.send_message(f"Ticker `{ticker}` invalid.")
+        return
+    try:
+        order_object = make_order(order_type, ticker, shares, get_current_time(), limit_price, stop_price)
+    except ValueError as e:
+        await interaction.response.send_message(str(e))
+        return
+
+    await interaction.response.defer(thinking=True)
+
+    (latest_price, _), _, _ = await async_facade.run_blocking(data.get_asset_info, order_object.ticker, True)
+    if latest_price is None:
+        await interaction.followup.send(f"Ticker `{ticker}` invalid.")
+        return
+
+    entry = await async_facade.run_blocking(trigger_order_store.add, account_name, transaction, order_object)
+    trigger_book.add(entry)
+    await interaction.followup.send(f"Order placed for {account_name}: {describe_trigger_order(entry)}")
+
+@bot.tree.command(name="open_orders", description="List resting limit and stop orders")
+@app_commands.describe(account_name="Account name")
+async def open_orders(interaction: discord.Interaction, account_name: str):
+    entries = await async_facade.run_blocking(trigger_order_store.for_account, account_name)
+    if not entries:
+        await interaction.response.send_message(f"No open orders for `{account_name}`.")
+        return
+    await interaction.response.defer(thinking=True)
+    await send_lines(interaction.followup, [f"Open orders for {account_name}:"] + [describe_trigger_order(entry) for entry in entries])
+
+@bot.tree.command(name="cancel_order", description="Cancel a resting limit or stop order")
+@app_commands.describe(account_name="Account name", order_id="Order id from /open_orders")
+async def cancel_order(interaction: discord.Interaction, account_name: str, order_id: str):
+    try:
+        entry_id = ObjectId(order_id.strip("` "))
+    except InvalidId:
+        await interaction.response.send_message(f"Order `{order_id}` not found for `{account_name}`.")
+        return
+    if not await async_facade.run_blocking(trigger_order_store.claim, entry_id, account_name):
+        await interaction.response.send_message(f"Order `{order_id}` not found for `{account_name}`.")
+        return
+    trigger_book.remove(entry_id)
+    await interaction.response.send_message(f"Order `{order_id}` cancelled.")
 
 @bot.tree.command(name="portfolio_summary", description="Show portfolio summary")
 @app_commands.describe(name="Account name")
 async def portfolio_summary(interaction: discord.Interaction, name: str):
     await interaction.response.defer(thinking=True)  
 
-    await keep_alive_ping()
-
-    positions_info, account_info = evaluate_account_positions(name)
+    positions_info, account_info = await async_facade.run_blocking(evaluate_account_positions, name)
     if positions_info is None:
         await interaction.followup.send(f"Account `{name}` does not exist.")
         return
@@ -379,10 +709,6 @@ async def portfolio_summary(interaction: discord.Interaction, name: str):
 @bot.tree.command(name="create_account", description="Create a trading account")
 @app_commands.describe(name="Name of your account", starting_value="Starting cash value")
 async def create_account(interaction: discord.Interaction, name: str, starting_value: float):
-    if name in get_account_names():
-        await interaction.response.send_message(f"Account `{name}` already exists.")
-        return
-    
     account_history = {str(get_prev_date()): {"value": starting_value, "return": 0}}
     
     account_info = {
@@ -392,32 +718,28 @@ async def create_account(interaction: discord.Interaction, name: str, starting_v
         "account_history": account_history,
     }
 
-    data = load_accounts()
-    data[name] = account_info
-    save_accounts(data)
+    if not await async_facade.run_blocking(account_repository.create, name, account_info):
+        await interaction.response.send_message(f"Account `{name}` already exists.")
+        return
 
     await interaction.response.send_message(f"Account `{name}` created with ${starting_value:,.2f}.")
 
 @bot.tree.command(name="delete_account", description="Delete an account")
 @app_commands.describe(name="Name of the account")
 async def delete_account(interaction: discord.Interaction, name: str):
-    if name not in get_account_names():
+    if not await async_facade.run_blocking(account_repository.delete, name):
         await interaction.response.send_message(f"Account `{name}` does not exist.")
         return
-    accounts = load_accounts()
-    del accounts[name]
-    save_accounts(accounts)
+    account_locks.discard(name)
     await interaction.response.send_message(f"Account `{name}` has been deleted.")
 
 @bot.tree.command(name="accounts_list", description="Show list of accounts")
 async def show_accounts_list(interaction: discord.Interaction):
     await interaction.response.defer(thinking=True)  
 
-    await keep_alive_ping()
-
     report = f"Accounts list:\n"
-    for account in load_accounts():
-        account_info = evaluate_account_positions(account)[1]
+    valuations = await async_facade.run_blocking(evaluate_all_accounts)
+    for account, (_, account_info) in valuations.items():
         account_value = account_info["account_value"]
         day_pnl = account_info["day_pnl"]
         day_change = account_info["day_change"]
@@ -432,12 +754,8 @@ async def show_accounts_list(interaction: discord.Interaction):
 
 @bot.tree.command(name="pending_orders", description="Show pending orders")
 async def get_pending_orders(interaction: discord.Interaction):
-    global reconciliation_orders
-
-    await keep_alive_ping()
-
     report = f"Pending orders:\n"
-    for reconciliation_order in reconciliation_orders:
+    for reconciliation_order in await async_facade.run_blocking(pending_order_store.all):
         account = reconciliation_order["account"]
         transaction = reconciliation_order["transaction"]
         order_type = reconciliation_order["order"].type
@@ -450,34 +768,36 @@ async def get_pending_orders(interaction: discord.Interaction):
 @bot.tree.command(name="account_history", description="Get account history plot")
 @app_commands.describe(name="Name of your account")
 async def account_history(interaction: discord.Interaction, name: str):
-    if name not in get_account_names():
+    account = await async_facade.run_blocking(load_account, name)
+    if account is None:
         await interaction.response.send_message(f"Account `{name}` does not exist.")
         return
 
-    account_history = load_accounts()[name]["account_history"]
-    buf = performance.get_history_plot(name, account_history)
+    account_history = account["account_history"]
+    buf = await chart_service.get_history_plot(name, account_history)
     file = discord.File(fp=buf, filename=f"{name}_history.png")
     await interaction.response.send_message(file=file)
 
 @bot.tree.command(name="account_returns", description="Get account returns plot")
 @app_commands.describe(name="Name of your account")
 async def account_returns(interaction: discord.Interaction, name: str):
-    if name not in get_account_names():
+    account = await async_facade.run_blocking(load_account, name)
+    if account is None:
         await interaction.response.send_message(f"Account `{name}` does not exist.")
         return
 
-    account_history = load_accounts()[name]["account_history"]
-    buf = performance.get_returns_plot(name, account_history)
+    account_history = account["account_history"]
+    buf = await chart_service.get_returns_plot(name, account_history)
     file = discord.File(fp=buf, filename=f"{name}_returns.png")
     await interaction.response.send_message(file=file)
 
 @bot.tree.command(name="multi_account_returns", description="Get account returns plot for all accounts")
 async def multi_account_returns(interaction: discord.Interaction):
     accounts = {}
-    account_infos = load_accounts()
+    account_infos = await async_facade.run_blocking(view_accounts)
     for account in account_infos:
         accounts[account] = account_infos[account]["account_history"]
-    buf = performance.get_multi_returns_plot(accounts)
+    buf = await chart_service.get_multi_returns_plot(accounts)
     file = discord.File(fp=buf, filename=f"multi_returns.png")
     await interaction.response.send_message(file=file)
 
@@ -491,10 +811,25 @@ async def info(interaction: discord.Interaction):
         )
     )
 
-@app_commands.describe(
-    sector="Stock sector",
-)
-@app_commands.choices(sector=[
+@bot.tree.command(name="bot_stats", description="Show bot latency and cache diagnostics")
+@app_commands.default_permissions(administrator=True)
+async def bot_stats(interaction: discord.Interaction):
+    summary = metrics.summary()
+    lines = [f"{'timer':<36}{'count':>7}{'avg ms':>9}{'p95 ms':>9}{'max ms':>9}"]
+    for name, stats in sorted(summary["histograms"].items()):
+        lines.append(f"{name[:36]:<36}{stats['count']:>7}{stats['avg_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['max_ms']:>9.1f}")
+    for name, value in sorted(summary["counters"].items()):
+        lines.append(f"{name}: {value:g}")
+    lines.append("")
+    for name, value in summary["gauges"].items():
+        lines.append(f"{name}: {value:,.3f}" if name.endswith(("ratio", "_ms")) else f"{name}: {value:,.0f}")
+
+    body = "\n".join(lines)
+    if len(body) > 1990 - 8:
+        body = body[:1990 - 12] + "\n..."
+    await interaction.response.send_message(f"```\n{body}\n```", ephemeral=True)
+
+sector_choices = [
     app_commands.Choice(name="Information Technology", value="Information Technology"),
     app_commands.Choice(name="Communication Services", value="Communication Services"),
     app_commands.Choice(name="Consumer Discretionary", value="Consumer Discretionary"),
@@ -506,7 +841,12 @@ async def info(interaction: discord.Interaction):
     app_commands.Choice(name="Materials", value="Materials"),
     app_commands.Choice(name="Utilities", value="Utilities"),
     app_commands.Choice(name="Real Estate", value="Real Estate"),
-])
+]
+
+@app_commands.describe(
+    sector="Stock sector",
+)
+@app_commands.choices(sector=sector_choices)
 @bot.tree.command(name="sector_tickers", description="Show tickers by sector")
 async def info(interaction: discord.Interaction, sector: str):
     sector_tickers = sectors[sector]
@@ -557,17 +897,52 @@ async def info(interaction: discord.Interaction, sector: str):
     first_embed.set_footer(text=f"Page 1/{len(pages)}")
     await interaction.response.send_message(embed=first_embed, view=CatalogView())
 
+@bot.tree.command(name="sector_performance", description="Show day performance and a heatmap by sector")
+@app_commands.describe(sector="Stock sector (all sectors if omitted)")
+@app_commands.choices(sector=sector_choices)
+async def sector_performance_command(interaction: discord.Interaction, sector: str | None = None):
+    await interaction.response.defer(thinking=True)
+
+    result, buf = await chart_service.sector_heatmap(sector)
+    if sector is None:
+        lines = [f"{'sector':<24}{'chg':>8}{'adv/dec':>9}  best / worst"]
+        for row in result["sectors"]:
+            if not row["count"]:
+                lines.append(f"{row['name']:<24}{'n/a':>8}")
+                continue
+            best, worst = row["best"], row["worst"]
+            lines.append(
+                f"{row['name']:<24}{row['change']:>+7.2f}%{row['advancers']:>5}/{row['decliners']:<3}"
+                f"  {best[0]} {best[1]:+.1f}% / {worst[0]} {worst[1]:+.1f}%"
+            )
+    else:
+        row = result["sectors"][0]
+        if not row["count"]:
+            await interaction.followup.send(f"No quotes available for {sector}.")
+            return
+        lines = [f"{sector}: {row['change']:+.2f}% ({row['advancers']} up, {row['decliners']} down)"]
+        lines += [f"{ticker:<8}{change:>+7.2f}%" for ticker, change in result["tickers"][sector]]
+
+    body = "\n".join(lines)
+    if len(body) > 1990 - 8:
+        body = body[:1990 - 12] + "\n..."
+    file = discord.File(fp=buf, filename="sector_heatmap.png")
+    await interaction.followup.send(f"```\n{body}\n```", file=file)
+
 @bot.tree.command(name="getquote", description="Show quote info")
 @app_commands.describe(ticker="Stock Ticker")
+@app_commands.autocomplete(ticker=ticker_autocomplete)
 async def get_quote(interaction: discord.Interaction, ticker: str):
+    if ticker_index.is_rejected(ticker):
+        await interaction.response.send_message(f"Ticker `{ticker}` is invalid.")
+        return
     await interaction.response.defer(thinking=True)
 
-    await keep_alive_ping()
-
-    latest_price, previous_close, asset_type = data.get_asset_info(ticker, True)
+    latest_price, previous_close, asset_type = await async_facade.get_asset_info(ticker, True)
 
-    if latest_price is None:
+    if latest_price[0] is None:
         await interaction.followup.send(f"Ticker `{ticker}` is invalid.")
+        return
 
     report = f"{ticker}: ${round(latest_price[0], 2)} "
 
@@ -581,72 +956,88 @@ async def get_quote(interaction: discord.Interaction, ticker: str):
     else:
         report += f"(⚪ {day_pnl:+,.2f} {day_change:+,.2f}%)\n"
 
-    market_open, market_close = order.get_market_open_close()
     current_time = get_current_time()
-
-    if get_current_date() != latest_price[1].date():
-        report += f"Market Closed"
-    elif asset_type == "EQUITY" and (current_time < market_open or current_time > market_close):
+    if not order.is_market_open(asset_type, current_time, latest_price[1]):
         report += f"Market Closed"
     else:
         estimated_delay = ceil((current_time - latest_price[1]).total_seconds() / 60)
         report += f"Estimated Delay: {estimated_delay} minutes"
+        if asset_type in trading_calendar.SESSION_ASSET_TYPES:
+            state = trading_calendar.session_state(current_time)
+            if state == trading_calendar.PRE_MARKET:
+                report += " (pre-market)"
+            elif state == trading_calendar.POST_MARKET:
+                report += " (after hours)"
 
     await interaction.followup.send(report)
 
 @bot.tree.command(name="five_minute_chart", description="Get 5 minute chart for a ticker")
 @app_commands.describe(ticker="Stock Ticker")
+@app_commands.autocomplete(ticker=ticker_autocomplete)
 async def five_minute_chart(interaction: discord.Interaction, ticker: str):
+    if ticker_index.is_rejected(ticker):
+        await interaction.response.send_message(f"Ticker `{ticker}` is invalid.")
+        return
     await interaction.response.defer(thinking=True)  
 
-    await keep_alive_ping()
-
-    buf = charts.close_chart(ticker, "5 minute")
+    buf = await chart_service.close_chart(ticker, "5 minute")
     file = discord.File(fp=buf, filename=f"five_minute_chart.png")
     await interaction.followup.send(file=file)
 
 @bot.tree.command(name="extended_hours_five_minute_chart", description="Get extended hours 5 minute chart for a ticker")
+@app_commands.autocomplete(ticker=ticker_autocomplete)
 async def extended_hours_five_minute_chart(interaction: discord.Interaction, ticker: str):
+    if ticker_index.is_rejected(ticker):
+        await interaction.response.send_message(f"Ticker `{ticker}` is invalid.")
+        return
     await interaction.response.defer(thinking=True)  
 
-    await keep_alive_ping()
-
-    buf = charts.close_chart(ticker, "5 minute extended hours")
+    buf = await chart_service.close_chart(ticker, "5 minute extended hours")
     file = discord.File(fp=buf, filename=f"extended_hours_five_minute_chart.png")
     await interaction.followup.send(file=file)
 
 @bot.tree.command(name="hourly_chart", description="Get hourly chart for a ticker")
 @app_commands.describe(ticker="Stock Ticker")
+@app_commands.autocomplete(ticker=ticker_autocomplete)
 async def hourly_chart(interaction: discord.Interaction, ticker: str):
+    if ticker_index.is_rejected(ticker):
+        await interaction.response.send_message(f"Ticker `{ticker}` is invalid.")
+        return
     await interaction.response.defer(thinking=True)  
 
-    await keep_alive_ping()
-
-    buf = charts.close_chart(ticker, "hourly")
+    buf = await chart_service.close_chart(ticker, "hourly")
     file = discord.File(fp=buf, filename=f"hourly_chart.png")
     await interaction.followup.send(file=file)
 
 @bot.tree.command(name="daily_chart", description="Get daily chart for a ticker")
 @app_commands.describe(ticker="Stock Ticker")
+@app_commands.autocomplete(ticker=ticker_autocomplete)
 async def daily_chart(interaction: discord.Interaction, ticker: str):
+    if ticker_index.is_rejected(ticker):
+        await interaction.response.send_message(f"Ticker `{ticker}` is invalid.")
+        return
     await interaction.response.defer(thinking=True)  
 
-    await keep_alive_ping()
-
-    buf = charts.close_chart(ticker, "daily")
+    buf = await chart_service.close_chart(ticker, "daily")
     file = discord.File(fp=buf, filename=f"daily_chart.png")
     await interaction.followup.send(file=file)
 
 @scheduler.scheduled_job('cron', hour=1, minute=0, second=0)
 async def daily_scheduled_report():
-    channel = bot.get_channel(ALLOWED_CHANNEL_ID)
+    if leader_elector is None or not leader_elector.is_leader:
+        return
+    report_date = str(get_prev_date())
+    # the history write is idempotent, so it always runs; the claim only dedupes the channel post
+    result = await async_facade.run_blocking(snapshot.take_snapshot, account_repository, report_date)
+    claimed = await async_facade.run_blocking(
+        claim_job_run, job_runs, "daily_report", report_date, leader_elector.lease.owner, leader_elector.lease.term
+    )
+    if not claimed:
+        return
+    channel = await get_report_channel()
 
     report = f"Daily update:\n"
-    updated_accounts = load_accounts()
-    accounts = load_accounts()
-    for account_name in accounts:
-        account = accounts[account_name]
-        account_info = evaluate_account_positions(account_name)[1]
+    for account_name, (_, account_info) in result["valuations"].items():
         account_value = account_info["account_value"]
         day_pnl = account_info["day_pnl"]
         day_change = account_info["day_change"]
@@ -656,18 +1047,11 @@ async def daily_scheduled_report():
             report += f"- {account_name}: ${account_value:,.2f} (🔴 {day_pnl:+,.2f} {day_change:+,.2f}%)\n"
         else:
             report += f"- {account_name}: ${account_value:,.2f} (⚪ {day_pnl:+,.2f} {day_change:+,.2f}%)\n"
+    for account_name, tickers in result["unpriced"].items():
+        report += f"- {account_name}: not valued, no price for {', '.join(tickers) or 'its holdings'}\n"
 
-        starting_value = list(account["account_history"].values())[0]["value"]
-        pnl = account_value - starting_value
-        account_return = round(pnl / starting_value * 100, 2)
-        
-        updated_accounts[account_name]["account_history"][str(get_prev_date())] = {
-            "value": account_value,
-            "return": account_return
-        }
-    
-    save_accounts(updated_accounts)
     await channel.send(report)
 
-keep_alive()
-bot.run(DISCORD_TOKEN)
+if __name__ == "__main__":
+    bot.run(DISCORD_TOKEN)
+
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import async_facade
+import charts
+import performance
+import sector_performance
+from instrumentation import timer
+
+def _history_version(account_history: dict) -> str:
+    return hashlib.sha256(json.dumps(account_history, sort_keys=True, default=str).encode()).hexdigest()
+
+def _render_bytes(func, *args) -> bytes:
+    result = func(*args)
+    return result if isinstance(result, bytes) else result.getvalue()
+
+class ChartService:
+    """
+    Renders charts in a process pool with the object-oriented Figure API and keeps a
+    content-addressed LRU cache of the resulting PNG bytes.
+
+    Price charts are keyed by (ticker, frequency, last bar timestamp) and account
+    plots by (account, history version), so repeated requests within a bar or
+    between history updates are served from memory. Sector heatmaps are keyed by the
+    content of the sector performance they show.
+    """
+
+    def __init__(self, workers: int = 2, max_entries: int = 256):
+        self.workers = workers
+        self.max_entries = max_entries
+        self._pool: ProcessPoolExecutor | None = None
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._rendering: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self.render_seconds = 0.0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _render(self, key: tuple, func, *args) -> io.BytesIO:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+
+        png = self._cache.get(digest)
+        if png is not None:
+            self._cache.move_to_end(digest)
+            self.hits += 1
+            return io.BytesIO(png)
+
+        in_flight = self._rendering.get(digest)
+        if in_flight is not None:
+            self.hits += 1
+            return io.BytesIO(await asyncio.shield(in_flight))
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._rendering[digest] = future
+        try:
+            start = time.perf_counter()
+            with timer("chart_render_seconds", kind=key[0]):
+                png = await loop.run_in_executor(self._get_pool(), _render_bytes, func, *args)
+            self.render_seconds += time.perf_counter() - start
+            self.renders += 1
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self._rendering[digest]
+
+        future.set_result(png)
+        self._cache[digest] = png
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return io.BytesIO(png)
+
+    async def close_chart(self, ticker: str, frequency: str) -> io.BytesIO:
+        times, closes, prev_close = await async_facade.run_blocking(charts.get_chart_data, ticker, frequency)
+        last_bar = times[-1].isoformat() if times else None
+        key = ("close_chart", ticker.upper(), frequency, last_bar)
+        return await self._render(key, charts.render_close_chart, ticker, frequency, times, closes, prev_close)
+
+    async def get_history_plot(self, account_name: str, account_history: dict) -> io.BytesIO:
+        key = ("history", account_name, _history_version(account_history))
+        return await self._render(key, performance.get_history_plot, account_name, account_history)
+
+    async def get_returns_plot(self, account_name: str, account_history: dict) -> io.BytesIO:
+        key = ("returns", account_name, _history_version(account_history))
+        return await self._render(key, performance.get_returns_plot, account_name, account_history)
+
+    async def get_multi_returns_plot(self, accounts: dict) -> io.BytesIO:
+        key = ("multi_returns", _history_version(accounts))
+        return await self._render(key, performance.get_multi_returns_plot, accounts)
+
+    async def sector_heatmap(self, sector: str | None = None) -> tuple[dict, io.BytesIO]:
+        """
+        Returns:
+            (sector performance, heatmap PNG) for one sector, or every sector if `sector` is None
+        """
+        result = await async_facade.run_blocking(sector_performance.get_sector_performance, sector)
+        title = f"{sector or 'Sector'} Day Change"
+        key = ("sector_heatmap", sector, _history_version(result))
+        return result, await self._render(key, sector_performance.render_sector_heatmap, result, title)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "renders": self.renders,
+            "avg_render_ms": self.render_seconds / self.renders * 1000 if self.renders else 0.0,
+        }
+
+chart_service = ChartService(
+    workers=int(os.getenv("CHART_WORKERS", "2")),
+    max_entries=int(os.getenv("CHART_CACHE_ENTRIES", "256")),
+)
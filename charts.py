@@ -1,23 +1,30 @@
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker
+from datetime import datetime
 import io
 import data
+from lazy_imports import lazy_import
 
-def close_chart(ticker: str, frequency: str) -> io.BytesIO:
-    frequency_mappings = {
-        "5 minute": data.get_five_min_data,
-        "5 minute extended hours": data.get_extended_hours_five_min_data,
-        "hourly": data.get_hourly_data,
-        "daily": data.get_daily_data
-    }
-    chart_title_mappings = {
-        "5 minute": "5 Minute",
-        "5 minute extended hours": "5 Minute Extended Hours",
-        "hourly": "Hourly",
-        "daily": "Daily"
-    }
-
-    times, closes, prev_close = frequency_mappings[frequency](ticker)
+mticker = lazy_import("matplotlib.ticker")
+style = lazy_import("matplotlib.style")
+mfigure = lazy_import("matplotlib.figure")
+
+frequency_mappings = {
+    "5 minute": data.get_five_min_data,
+    "5 minute extended hours": data.get_extended_hours_five_min_data,
+    "hourly": data.get_hourly_data,
+    "daily": data.get_daily_data
+}
+chart_title_mappings = {
+    "5 minute": "5 Minute",
+    "5 minute extended hours": "5 Minute Extended Hours",
+    "hourly": "Hourly",
+    "daily": "Daily"
+}
+
+def get_chart_data(ticker: str, frequency: str) -> tuple[list[datetime], list[float], float]:
+    return frequency_mappings[frequency](ticker)
+
+def render_close_chart(ticker: str, frequency: str, times: list[datetime], closes: list[float],
+                       prev_close: float) -> bytes:
     times_naive = [t.replace(tzinfo=None) for t in times]
 
     final_price = closes[-1]
@@ -31,37 +38,41 @@ def close_chart(ticker: str, frequency: str) -> io.BytesIO:
         line_color = "gray"
         fill_color = "gray"
 
-    plt.style.use("dark_background")
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.set_facecolor("black")
+    with style.context("dark_background"):
+        fig = mfigure.Figure(figsize=(10, 5))
+        ax = fig.subplots()
+        ax.set_facecolor("black")
 
-    ax.plot(range(len(closes)), closes, color=line_color, linewidth=1.8, zorder=2, label="Price")
-    ax.set_xticks(range(0, len(times_naive), len(times_naive)//5))
-    ax.set_xticklabels([t.strftime("%b %d %I:%M %p") for t in times[::len(times_naive)//5]])
-    
-    ymin = min(min(closes), prev_close)
+        ax.plot(range(len(closes)), closes, color=line_color, linewidth=1.8, zorder=2, label="Price")
+        step = max(len(times_naive) // 5, 1)
+        ax.set_xticks(range(0, len(times_naive), step))
+        ax.set_xticklabels([t.strftime("%b %d %I:%M %p") for t in times[::step]])
 
-    ax.fill_between(range(len(closes)), closes, ymin,
-                    color=fill_color, alpha=0.6, zorder=1)
+        ymin = min(min(closes), prev_close)
 
-    ax.axhline(prev_close, color="gray", linestyle="--", linewidth=1, alpha=0.9, label="Prev Close")
+        ax.fill_between(range(len(closes)), closes, ymin,
+                        color=fill_color, alpha=0.6, zorder=1)
 
-    fig.autofmt_xdate(rotation=30)
+        ax.axhline(prev_close, color="gray", linestyle="--", linewidth=1, alpha=0.9, label="Prev Close")
 
-    ax.yaxis.set_major_formatter(mticker.StrMethodFormatter("{x:,.2f}"))
+        fig.autofmt_xdate(rotation=30)
 
-    ax.set_title(f"{ticker} {chart_title_mappings[frequency]} Price Chart", color="white", fontsize=14)
-    ax.set_xlabel("Time", color="white")
-    ax.set_ylabel("Price (USD)", color="white")
-    ax.tick_params(colors="white")
-    ax.legend()
+        ax.yaxis.set_major_formatter(mticker.StrMethodFormatter("{x:,.2f}"))
 
-    plt.tight_layout()
+        ax.set_title(f"{ticker} {chart_title_mappings[frequency]} Price Chart", color="white", fontsize=14)
+        ax.set_xlabel("Time", color="white")
+        ax.set_ylabel("Price (USD)", color="white")
+        ax.tick_params(colors="white")
+        ax.legend()
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", facecolor=plt.gcf().get_facecolor())
-    buf.seek(0)
-    plt.close()
-    return buf
+        fig.tight_layout()
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", facecolor=fig.get_facecolor())
+    return buf.getvalue()
+
+def close_chart(ticker: str, frequency: str) -> io.BytesIO:
+    times, closes, prev_close = get_chart_data(ticker, frequency)
+    return io.BytesIO(render_close_chart(ticker, frequency, times, closes, prev_close))
 
 # close_chart("AAPL", "daily")
@@ -1,16 +1,50 @@
-import yfinance as yf
+from __future__ import annotations
+
+from lazy_imports import lazy_import
+
+yf = lazy_import("yfinance")
+pd = lazy_import("pandas")
 from datetime import datetime, timezone, timedelta
+from quote_cache import cached, quote_cache
+from bar_store import bar_store
+from price_table import price_table
+from instrumentation import timed
+from ticker_index import ticker_index
+from asset_metadata import asset_metadata
+import trading_calendar
+
+def get_asset_type(ticker: str) -> str | None:
+    metadata = asset_metadata.get(ticker)
+    return metadata.quote_type if metadata is not None else None
 
 def get_asset_info(ticker: str, extended_hours: bool = False) -> tuple[tuple[float, datetime], tuple[float, datetime], str]:
     """
+    Served from the ingested price table when it holds a fresh tick for the ticker,
+    otherwise fetched from Yahoo. Symbols the ticker index knows to be invalid are
+    answered without any fetch.
+
     Returns:
         latest_price: (float, datetime in UTC)
         previous_close: (float, datetime in UTC)
         asset_type: (str)
     """
-    asset = yf.Ticker(ticker)
-    asset_type = asset.info.get("quoteType")
+    tick = price_table.get(ticker)
+    if tick is not None and tick.prev_close is not None:
+        return (tick.price, tick.timestamp), (tick.prev_close, tick.prev_timestamp), get_asset_type(ticker)
+    if ticker_index.is_rejected(ticker):
+        return (None, None), (None, None), None
+    asset_info = _fetch_asset_info(ticker, extended_hours)
+    ticker_index.record(ticker, asset_info[0][0] is not None or asset_info[2] is not None)
+    return asset_info
 
+@cached()
+@timed("data_fetch_seconds", op="asset_info")
+def _fetch_asset_info(ticker: str, extended_hours: bool = False) -> tuple[tuple[float, datetime], tuple[float, datetime], str]:
+    asset_type = get_asset_type(ticker)
+    if asset_type is None:
+        return (None, None), (None, None), None
+
+    asset = yf.Ticker(ticker)
     intraday = asset.history(period="1d", interval="1m", prepost=extended_hours)
     if intraday.empty:
         latest_price = (None, None)
@@ -31,32 +65,147 @@ def get_asset_info(ticker: str, extended_hours: bool = False) -> tuple[tuple[flo
 
     return latest_price, previous_close, asset_type
 
+def _download_closes(tickers: list[str], **kwargs) -> pd.DataFrame:
+    frame = yf.download(tickers, progress=False, auto_adjust=False, threads=True, **kwargs)
+    if frame.empty:
+        return pd.DataFrame(columns=tickers, dtype=float)
+
+    closes = frame["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    closes = closes.reindex(columns=tickers)
+
+    if closes.index.tz is None:
+        closes.index = closes.index.tz_localize(timezone.utc)
+    else:
+        closes.index = closes.index.tz_convert(timezone.utc)
+    return closes
+
+def _latest_valid(closes: pd.DataFrame, offset: int) -> tuple[pd.Series, pd.Series]:
+    """
+    Returns the close and timestamp of the `offset`-th last valid row of every column.
+    """
+    valid = closes.notna()
+    from_end = valid[::-1].cumsum()[::-1]
+    selected = closes.where(valid & (from_end == offset))
+    return selected.max(), selected.apply(pd.Series.last_valid_index)
+
+@timed("data_fetch_seconds", op="asset_infos")
+def fetch_asset_infos(tickers: list[str], extended_hours: bool = False) -> pd.DataFrame:
+    """
+    Uncached batched fetch behind get_asset_infos, also used by the price ingestor.
+    """
+    tickers = list(tickers)
+    intraday = _download_closes(tickers, period="1d", interval="1m", prepost=extended_hours)
+    daily = _download_closes(tickers, period="5d", interval="1d")
+
+    price, timestamp = _latest_valid(intraday, 1)
+    prev_close, prev_timestamp = _latest_valid(daily, 2)
+
+    return pd.DataFrame({
+        "price": price.astype(float),
+        "timestamp": timestamp,
+        "prev_close": prev_close.astype(float),
+        "prev_timestamp": prev_timestamp,
+    }, index=pd.Index(tickers, name="ticker"))
+
+def get_asset_infos(tickers: list[str], extended_hours: bool = False) -> pd.DataFrame:
+    """
+    Batched version of get_asset_info for many tickers using one multi-ticker download
+    per interval. Tickers with a fresh tick in the ingested price table are not fetched.
+
+    Returns:
+        DataFrame indexed by upper-cased ticker with columns
+        price, timestamp (UTC), prev_close, prev_timestamp (UTC).
+        Tickers without data have NaN/NaT values.
+    """
+    key_tickers = tuple(sorted({ticker.upper() for ticker in tickers}))
+    if not key_tickers:
+        return pd.DataFrame(columns=["price", "timestamp", "prev_close", "prev_timestamp"],
+                            index=pd.Index([], name="ticker"))
+
+    index = pd.Index(key_tickers, name="ticker")
+    live, missing = price_table.frame(key_tickers)
+    missing = tuple(ticker for ticker in missing if not ticker_index.is_rejected(ticker))
+    if not missing:
+        return live.reindex(index)
+
+    key = ("get_asset_infos", missing, extended_hours)
+    fetched = quote_cache.get_or_fetch(key, lambda: fetch_asset_infos(missing, extended_hours))
+    if live.empty:
+        return fetched.reindex(index)
+    return pd.concat([live, fetched]).reindex(index)
+
+def asset_info_tuples(asset_infos: pd.DataFrame) -> dict[str, tuple]:
+    """
+    Converts a get_asset_infos frame into get_asset_info results, e.g. for
+    order.evaluate_market_order.
+
+    Returns:
+        {ticker: (latest_price, previous_close, asset_type)} for the tickers that have a price
+    """
+    results = {}
+    for ticker, row in zip(asset_infos.index, asset_infos.itertuples(index=False)):
+        if pd.isna(row.price):
+            continue
+        previous_close = (None, None)
+        if not pd.isna(row.prev_close):
+            previous_close = (float(row.prev_close), pd.Timestamp(row.prev_timestamp).to_pydatetime())
+        results[ticker] = (
+            (float(row.price), pd.Timestamp(row.timestamp).to_pydatetime()),
+            previous_close,
+            get_asset_type(ticker),
+        )
+    return results
+
+def _latest_session(bars: pd.DataFrame) -> pd.DataFrame:
+    if bars.empty:
+        return bars
+    return bars[bars.index.date == bars.index[-1].date()]
+
+def _previous_close(ticker: str, bars: pd.DataFrame) -> float | None:
+    """
+    Close of the session before the latest one in `bars`. For exchange-traded assets,
+    extended-hours bars after that day's regular close are ignored.
+    """
+    if bars.empty:
+        return None
+    dates = bars.index.date
+    previous = bars[dates < dates[-1]]
+    if previous.empty:
+        return None
+    day = trading_calendar.trading_day(previous.index[-1].date())
+    if day is not None and get_asset_type(ticker) in trading_calendar.SESSION_ASSET_TYPES:
+        previous = previous[previous.index < day.close]
+    return float(previous["Close"].iloc[-1]) if not previous.empty else None
+
+@cached()
 def get_five_min_data(ticker: str) -> tuple[list[datetime], list[float], float]:
-    asset = yf.Ticker(ticker)
-    data = asset.history(period="1d", interval="5m")
-    prev_close = asset.info.get("previousClose", None)
-    return data.index.to_list(), data["Close"].to_list(), prev_close
+    bars = bar_store.get_bars(ticker, "5m", timedelta(days=5))
+    data = _latest_session(bars)
+    return data.index.to_list(), data["Close"].to_list(), _previous_close(ticker, bars)
 
+@cached()
 def get_extended_hours_five_min_data(ticker: str) -> tuple[list[datetime], list[float], float]:
-    asset = yf.Ticker(ticker)
-    data = asset.history(period="1d", interval="5m", prepost=True)
-    prev_close = asset.info.get("previousClose", None)
-    return data.index.to_list(), data["Close"].to_list(), prev_close
+    bars = bar_store.get_bars(ticker, "5m", timedelta(days=5), prepost=True)
+    data = _latest_session(bars)
+    return data.index.to_list(), data["Close"].to_list(), _previous_close(ticker, bars)
 
+@cached()
 def get_hourly_data(ticker: str) -> tuple[list[datetime], list[float], float]:
-    asset = yf.Ticker(ticker)
-    data = asset.history(period="14d", interval="1h")
+    data = bar_store.get_bars(ticker, "1h", timedelta(days=14))
 
     latest_date = data.index[-1].date()
-    this_week = data[data.index.date >= latest_date.replace(day=latest_date.day - 7)]
-    prev_week = data[data.index.date < latest_date.replace(day=latest_date.day - 7)]
+    week_ago = latest_date - timedelta(days=7)
+    this_week = data[data.index.date >= week_ago]
+    prev_week = data[data.index.date < week_ago]
 
     prev_close = prev_week["Close"].iloc[-1] if not prev_week.empty else None
     return this_week.index.to_list(), this_week["Close"].to_list(), prev_close
 
+@cached()
 def get_daily_data(ticker: str) -> tuple[list[datetime], list[float], float]:
-    asset = yf.Ticker(ticker)
-    data = asset.history(period="70d", interval="1d")
+    data = bar_store.get_bars(ticker, "1d", timedelta(days=70))
     
     if data.empty:
         return [], [], None
@@ -0,0 +1,84 @@
+import asyncio
+from collections import defaultdict
+
+from ledger import LotLedger, lot_count
+from order import Order
+
+FILL_RETRIES = 5
+
+def record_filled_order(account: dict, transaction: str, order: Order,
+                        method: str | None = None) -> tuple[dict, str]:
+    shares = order.shares if transaction == "BUY" else -order.shares
+    total_cost = shares * order.fill_price
+
+    if transaction == "BUY" and account["cash"] < total_cost:
+        return account, "Not enough funds"
+    
+    account["cash"] -= total_cost
+
+    ledger = LotLedger.load(account["unmatched_trades"].get(order.ticker), method)
+    ledger.apply(shares, order.fill_price)
+    if ledger.total_shares == 0:
+        account["positions"].pop(order.ticker, None)
+        account["unmatched_trades"].pop(order.ticker, None)
+    else:
+        account["positions"][order.ticker] = ledger.total_shares
+        account["unmatched_trades"][order.ticker] = ledger.to_doc()
+    return account, "Filled"
+
+def fill_order(repository, account_name: str, transaction: str, order: Order,
+               retries: int = FILL_RETRIES) -> str:
+    """
+    Applies a filled order to one account with optimistic versioning: the account is
+    read, updated in memory and written back only if no other fill landed in between,
+    retrying on conflict.
+
+    Returns:
+        "Filled", "Not enough funds", "Account does not exist" or "Conflict"
+    """
+    for _ in range(retries):
+        account = repository.load(account_name)
+        if account is None:
+            return "Account does not exist"
+
+        version = account["version"]
+        cash_before = account["cash"]
+        stored_before = account["unmatched_trades"].get(order.ticker)
+        lots_before = lot_count(stored_before)
+        account, status = record_filled_order(account, transaction, order)
+        if status != "Filled":
+            return status
+
+        lots = account["unmatched_trades"].get(order.ticker)
+        pushed_lot = None
+        # legacy list-of-dict ledgers are rewritten whole once, compact ones can be appended to
+        if lots and not isinstance(stored_before, list) and lot_count(lots) == lots_before + 1:
+            pushed_lot = lots["lots"][-1]
+        if repository.record_fill(
+            account_name,
+            order.ticker,
+            account["cash"] - cash_before,
+            account["positions"].get(order.ticker),
+            lots,
+            pushed_lot,
+            expected_version=version,
+        ):
+            return "Filled"
+    return "Conflict"
+
+class AccountLocks:
+    """
+    Per-account asyncio locks so fills on one account are serialized in-process while
+    fills on different accounts run in parallel.
+    """
+
+    def __init__(self):
+        self._locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def __call__(self, account_name: str) -> asyncio.Lock:
+        return self._locks[account_name]
+
+    def discard(self, account_name: str) -> None:
+        lock = self._locks.get(account_name)
+        if lock is not None and not lock.locked():
+            del self._locks[account_name]
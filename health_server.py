@@ -0,0 +1,73 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from aiohttp import web
+
+from instrumentation import Registry
+
+# check() -> (ok, detail)
+Check = Callable[[], Awaitable[tuple[bool, object]]]
+
+class HealthServer:
+    """
+    Liveness, readiness and metrics endpoints served by aiohttp on the bot's own event loop.
+
+        GET /         liveness, always 200 while the loop is serving
+        GET /ready    200 if every readiness check passes, else 503, with per-check detail
+        GET /metrics  Prometheus text format
+    """
+
+    def __init__(self, metrics: Registry, host: str = "0.0.0.0", port: int = 5000, check_timeout: float = 5.0):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.check_timeout = check_timeout
+        self._checks: dict[str, Check] = {}
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/", self.alive),
+            web.get("/ready", self.ready),
+            web.get("/metrics", self.metrics_text),
+        ])
+
+    def add_check(self, name: str, check: Check) -> None:
+        self._checks[name] = check
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _run_check(self, check: Check) -> dict:
+        try:
+            ok, detail = await asyncio.wait_for(check(), self.check_timeout)
+        except asyncio.TimeoutError:
+            ok, detail = False, "timed out"
+        except Exception as e:
+            ok, detail = False, repr(e)
+        return {"ok": bool(ok), "detail": detail}
+
+    async def readiness(self) -> tuple[bool, dict]:
+        results = await asyncio.gather(*(self._run_check(check) for check in self._checks.values()))
+        checks = dict(zip(self._checks, results))
+        return all(result["ok"] for result in results), checks
+
+    async def alive(self, request: web.Request) -> web.Response:
+        return web.Response(text="Bot is alive!")
+
+    async def ready(self, request: web.Request) -> web.Response:
+        ready, checks = await self.readiness()
+        return web.json_response({"ready": ready, "checks": checks}, status=200 if ready else 503)
+
+    async def metrics_text(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.metrics.render_prometheus(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
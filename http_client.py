@@ -0,0 +1,58 @@
+import time
+
+import aiohttp
+
+class HttpClient:
+    """
+    Shared, connection-pooled aiohttp session owned by the bot lifecycle.
+    """
+
+    def __init__(self, limit: int = 20, timeout: float = 10.0):
+        self.limit = limit
+        self.timeout = timeout
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self) -> None:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("HttpClient has not been started")
+        return self._session
+
+    async def get_status(self, url: str, **kwargs) -> int:
+        async with self.session.get(url, **kwargs) as resp:
+            await resp.read()
+            return resp.status
+
+class SelfPinger:
+    """
+    Pings the deployment URL to keep free-tier hosts awake, at most once per `min_interval` seconds.
+    """
+
+    def __init__(self, http: HttpClient, url: str, min_interval: float = 60.0):
+        self.http = http
+        self.url = url
+        self.min_interval = min_interval
+        self._last_ping = float("-inf")
+
+    async def ping(self) -> None:
+        now = time.monotonic()
+        if not self.url or now - self._last_ping < self.min_interval:
+            return
+        self._last_ping = now
+        try:
+            status = await self.http.get_status(self.url)
+            print(f"Pinged self ({status})")
+        except Exception as e:
+            print(f"Ping failed: {e}")
@@ -0,0 +1,213 @@
+import asyncio
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable
+
+# seconds; covers cache hits (sub-ms) up to slow Yahoo fetches and chart renders
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram in the Prometheus sense, plus count and sum.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the q-th quantile, capped at the observed max.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+class Registry:
+    """
+    In-memory metrics: labelled latency histograms and counters, plus collectors that
+    expose existing `stats()` dicts (caches, repository, chart service) as gauges.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._collectors: dict[str, Callable[[], dict]] = {}
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_collector(self, prefix: str, collect: Callable[[], dict]) -> None:
+        self._collectors[prefix] = collect
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(f"{name}_errors", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels):
+        """
+        Decorator timing every call of a sync or async function into histogram `name`.
+        """
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(name, **labels):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _gauges(self) -> list[tuple[str, float]]:
+        gauges = []
+        for prefix, collect in list(self._collectors.items()):
+            try:
+                stats = collect()
+            except Exception as e:
+                print(f"Metrics collector {prefix} failed: {e}")
+                continue
+            for key, value in stats.items():
+                if isinstance(value, (bool, int, float)):
+                    gauges.append((f"{prefix}_{key}", float(value)))
+        return gauges
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            histograms = [(key, h.buckets, list(h.counts), h.count, h.sum) for key, h in self._histograms.items()]
+            counters = list(self._counters.items())
+
+        lines = []
+        typed = set()
+        for (name, labels), buckets, counts, count, total in sorted(histograms):
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip((*buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_labels(labels, le=le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters):
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}_total{_labels(labels)} {value}")
+        for name, value in self._gauges():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            {"histograms": {display name: {count, avg_ms, p50_ms, p95_ms, max_ms}},
+             "counters": {display name: value}, "gauges": {name: value}}
+        """
+        with self._lock:
+            histograms = {
+                _display(name, labels): {
+                    "count": h.count,
+                    "avg_ms": h.sum / h.count * 1000 if h.count else 0.0,
+                    "p50_ms": h.quantile(0.5) * 1000,
+                    "p95_ms": h.quantile(0.95) * 1000,
+                    "max_ms": h.max * 1000,
+                }
+                for (name, labels), h in self._histograms.items()
+            }
+            counters = {_display(name, labels): value for (name, labels), value in self._counters.items()}
+        return {"histograms": histograms, "counters": counters, "gauges": dict(self._gauges())}
+
+class StartupTimer:
+    """
+    Startup timings: milestones are offsets from process start (e.g. imports done,
+    on_ready), phases are durations of individual steps that may overlap.
+    """
+
+    def __init__(self, origin: float | None = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.milestones: dict[str, float] = {}
+        self.phases: dict[str, float] = {}
+
+    def mark(self, milestone: str) -> float:
+        self.milestones[milestone] = time.perf_counter() - self.origin
+        return self.milestones[milestone]
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def stats(self) -> dict:
+        return {
+            **{f"until_{name}_ms": seconds * 1000 for name, seconds in self.milestones.items()},
+            **{f"{name}_ms": seconds * 1000 for name, seconds in self.phases.items()},
+        }
+
+    def report(self) -> str:
+        milestones = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.milestones.items())
+        phases = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        return f"startup: {milestones} | phases: {phases}"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(labels: tuple, **extra) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def _display(name: str, labels: tuple) -> str:
+    return name + (f"[{','.join(str(value) for _, value in labels)}]" if labels else "")
+
+metrics = Registry()
+timed = metrics.timed
+timer = metrics.timer
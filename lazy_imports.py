@@ -0,0 +1,49 @@
+import importlib
+import sys
+import threading
+import time
+import types
+
+# module name -> seconds spent importing it on first use
+import_timings: dict[str, float] = {}
+
+_lock = threading.Lock()
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a heavy module (pandas, matplotlib, yfinance, ...) that is only
+    imported on first attribute access, so importing the bot stays cheap and the cost
+    is paid by the first command that needs it.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_module"]
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    import_timings[self.__name__] = time.perf_counter() - start
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Returns the module itself if it was already imported, otherwise a LazyModule proxy.
+    """
+    return sys.modules.get(name) or LazyModule(name)
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import socket
+import time
+
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+import async_facade
+
+def default_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class LeaderLease:
+    """
+    Lease-based leader election over one Mongo document per lease name:
+    `{_id: name, owner, expires_at, term}`.
+
+    The owner renews the lease before it expires; anyone else can take it over once it
+    has expired, which increments `term` (usable as a fencing token). Leadership is
+    considered lost locally `margin` seconds before the lease expires, so a stalled
+    leader steps down before a standby can take over.
+    """
+
+    def __init__(self, collection: Collection, name: str, owner: str | None = None,
+                 ttl: float = 15.0, margin: float = 2.0):
+        self.collection = collection
+        self.name = name
+        self.owner = owner or default_owner_id()
+        self.ttl = ttl
+        self.margin = min(margin, ttl / 2)
+        self.term: int | None = None
+        self._valid_until = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    def try_acquire(self) -> bool:
+        """
+        Renews the lease if held, otherwise tries to take it over.
+
+        Returns:
+            True if this owner holds the lease afterwards
+        """
+        started = time.monotonic()
+        now = time.time()
+        renewed = self.collection.find_one_and_update(
+            {"_id": self.name, "owner": self.owner},
+            {"$set": {"expires_at": now + self.ttl}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if renewed is None:
+            try:
+                renewed = self.collection.find_one_and_update(
+                    {"_id": self.name, "expires_at": {"$lt": now}},
+                    {"$set": {"owner": self.owner, "expires_at": now + self.ttl}, "$inc": {"term": 1}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                renewed = None
+
+        if renewed is None:
+            self.term = None
+            self._valid_until = 0.0
+            return False
+        self.term = renewed["term"]
+        self._valid_until = started + self.ttl - self.margin
+        return True
+
+    def release(self) -> None:
+        self._valid_until = 0.0
+        self.term = None
+        self.collection.update_one({"_id": self.name, "owner": self.owner}, {"$set": {"expires_at": 0}})
+
+class LeaderElector:
+    """
+    Keeps trying to acquire or renew a LeaderLease in the background every `ttl / 3` seconds.
+    """
+
+    def __init__(self, lease: LeaderLease):
+        self.lease = lease
+        self.interval = lease.ttl / 3
+        self._task: asyncio.Task | None = None
+        self.transitions = 0
+        self.errors = 0
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lease.is_leader
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.lease.is_leader:
+            await async_facade.run_blocking(self.lease.release)
+
+    async def _run(self) -> None:
+        while True:
+            was_leader = self.lease.is_leader
+            try:
+                await async_facade.run_blocking(self.lease.try_acquire)
+            except PyMongoError as e:
+                self.errors += 1
+                print(f"Leader lease {self.lease.name} renewal failed: {e}")
+            if self.lease.is_leader != was_leader:
+                self.transitions += 1
+                state = f"acquired (term {self.lease.term})" if self.lease.is_leader else "lost"
+                print(f"Leadership of {self.lease.name} {state} by {self.lease.owner}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "is_leader": self.is_leader,
+            "term": self.lease.term or 0,
+            "transitions": self.transitions,
+            "errors": self.errors,
+        }
+
+def claim_job_run(collection: Collection, job: str, run_key: str, owner: str, term: int | None = None) -> bool:
+    """
+    Records that `job` ran for `run_key` (e.g. a report date). Only the first caller gets
+    True, so a job is not repeated when leadership changes hands within its window.
+    """
+    try:
+        collection.insert_one({"_id": f"{job}:{run_key}", "owner": owner, "term": term, "at": time.time()})
+        return True
+    except DuplicateKeyError:
+        return False
@@ -0,0 +1,146 @@
+from array import array
+
+FIFO = "FIFO"
+LIFO = "LIFO"
+AVERAGE = "AVERAGE"
+METHODS = (FIFO, LIFO, AVERAGE)
+
+class LotLedger:
+    """
+    Open lots for one position, stored in parallel arrays with running totals so
+    position size and cost basis are O(1).
+
+    Lot shares are signed (negative for short lots) and all open lots share one sign.
+    Closing trades consume lots FIFO, LIFO or at average cost.
+    """
+
+    __slots__ = ("method", "total_shares", "total_cost", "_shares", "_prices", "_head")
+
+    def __init__(self, method: str = FIFO):
+        if method not in METHODS:
+            raise ValueError(f"Unknown lot matching method {method}")
+        self.method = method
+        self.total_shares = 0
+        self.total_cost = 0.0
+        self._shares = array("q")
+        self._prices = array("d")
+        self._head = 0
+
+    @classmethod
+    def load(cls, value: dict | list | None, method: str | None = None) -> "LotLedger":
+        """
+        Builds a ledger from its compact document or from the legacy list of
+        `{"shares", "price"}` dicts.
+        """
+        if isinstance(value, dict):
+            ledger = cls(method or value.get("method", FIFO))
+            lots = value["lots"]
+        else:
+            ledger = cls(method or FIFO)
+            lots = [(lot["shares"], lot["price"]) for lot in value or []]
+        for shares, price in lots:
+            ledger._append(shares, price)
+        return ledger
+
+    def __len__(self) -> int:
+        return len(self._shares) - self._head
+
+    @property
+    def cost_basis(self) -> float:
+        return self.total_cost / self.total_shares if self.total_shares else 0.0
+
+    def lots(self) -> list[tuple[int, float]]:
+        return list(zip(self._shares[self._head:], self._prices[self._head:]))
+
+    def _append(self, shares: int, price: float) -> None:
+        self._shares.append(shares)
+        self._prices.append(price)
+        self.total_shares += shares
+        self.total_cost += shares * price
+
+    def _compact(self) -> None:
+        if self._head and self._head * 2 >= len(self._shares):
+            del self._shares[:self._head]
+            del self._prices[:self._head]
+            self._head = 0
+
+    def _close(self, shares: int) -> None:
+        """
+        Closes `shares` (opposite sign to the position, at most its size) against open lots.
+        """
+        if self.method == AVERAGE:
+            remaining = self.total_shares + shares
+            price = self.cost_basis
+            self._shares = array("q")
+            self._prices = array("d")
+            self._head = 0
+            self.total_shares = 0
+            self.total_cost = 0.0
+            if remaining:
+                self._append(remaining, price)
+            return
+
+        while shares:
+            index = self._head if self.method == FIFO else len(self._shares) - 1
+            lot_shares = self._shares[index]
+            price = self._prices[index]
+            if abs(lot_shares) > abs(shares):
+                self._shares[index] = lot_shares + shares
+                self.total_shares += shares
+                self.total_cost += shares * price
+                shares = 0
+            else:
+                shares += lot_shares
+                self.total_shares -= lot_shares
+                self.total_cost -= lot_shares * price
+                if self.method == FIFO:
+                    self._head += 1
+                else:
+                    self._shares.pop()
+                    self._prices.pop()
+
+        if not len(self):
+            self._shares = array("q")
+            self._prices = array("d")
+            self._head = 0
+            self.total_cost = 0.0
+        else:
+            self._compact()
+
+    def apply(self, shares: int, price: float) -> None:
+        """
+        Applies a signed fill: adds a lot when it extends the position, otherwise closes
+        lots and opens a new lot with any remainder that flips the position.
+        """
+        if not shares:
+            return
+        if not self.total_shares or (self.total_shares > 0) == (shares > 0):
+            self._append(shares, price)
+            return
+
+        closing = -self.total_shares if abs(shares) > abs(self.total_shares) else shares
+        self._close(closing)
+        if shares != closing:
+            self._append(shares - closing, price)
+
+    def to_doc(self) -> dict:
+        return {
+            "method": self.method,
+            "shares": self.total_shares,
+            "cost": self.total_cost,
+            "lots": [[shares, price] for shares, price in self.lots()],
+        }
+
+def position_totals(value: dict | list) -> tuple[int, float]:
+    """
+    Returns (total shares, total cost) of a stored ledger without rebuilding it.
+    """
+    if isinstance(value, dict):
+        return value["shares"], value["cost"]
+    ledger = LotLedger.load(value)
+    return ledger.total_shares, ledger.total_cost
+
+def lot_count(value: dict | list | None) -> int:
+    if isinstance(value, dict):
+        return len(value["lots"])
+    return len(value or [])
@@ -0,0 +1,229 @@
+import copy
+import threading
+from types import SimpleNamespace
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+_MISSING = object()
+
+def _get_path(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+def _parent(doc: dict, path: str, create: bool) -> tuple[dict | None, str]:
+    parts = path.split(".")
+    value = doc
+    for part in parts[:-1]:
+        if part not in value:
+            if not create:
+                return None, parts[-1]
+            value[part] = {}
+        value = value[part]
+    return value, parts[-1]
+
+def _matches_condition(value, condition) -> bool:
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for operator, operand in condition.items():
+            if operator == "$in":
+                candidate = None if value is _MISSING else value
+                if candidate not in operand:
+                    return False
+            elif operator == "$exists":
+                if (value is not _MISSING) != bool(operand):
+                    return False
+            elif operator == "$lte":
+                if value is _MISSING or not value <= operand:
+                    return False
+            elif operator == "$gte":
+                if value is _MISSING or not value >= operand:
+                    return False
+            elif operator == "$lt":
+                if value is _MISSING or not value < operand:
+                    return False
+            elif operator == "$ne":
+                if value is not _MISSING and value == operand:
+                    return False
+            else:
+                raise NotImplementedError(operator)
+        return True
+    if value is _MISSING:
+        return condition is None
+    return value == condition
+
+def _matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(doc, clause) for clause in condition):
+                return False
+        elif not _matches_condition(_get_path(doc, key), condition):
+            return False
+    return True
+
+def _apply_update(doc: dict, update: dict) -> None:
+    for operator, fields in update.items():
+        for path, operand in fields.items():
+            if operator == "$set":
+                parent, key = _parent(doc, path, True)
+                parent[key] = copy.deepcopy(operand)
+            elif operator == "$setOnInsert":
+                continue
+            elif operator == "$unset":
+                parent, key = _parent(doc, path, False)
+                if parent is not None:
+                    parent.pop(key, None)
+            elif operator == "$inc":
+                parent, key = _parent(doc, path, True)
+                parent[key] = parent.get(key, 0) + operand
+            elif operator == "$push":
+                parent, key = _parent(doc, path, True)
+                parent.setdefault(key, []).append(copy.deepcopy(operand))
+            elif operator == "$rename":
+                parent, key = _parent(doc, path, False)
+                if parent is not None and key in parent:
+                    new_parent, new_key = _parent(doc, operand, True)
+                    new_parent[new_key] = parent.pop(key)
+            else:
+                raise NotImplementedError(operator)
+
+def _project(doc: dict, projection: dict | None) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    projected = {"_id": doc["_id"]}
+    for key, include in projection.items():
+        if include and key in doc:
+            projected[key] = copy.deepcopy(doc[key])
+    return projected
+
+class LocalCursor(list):
+    def sort(self, key, direction=1):
+        super().sort(key=lambda doc: doc.get(key), reverse=direction < 0)
+        return self
+
+class LocalCollection:
+    """
+    Thread-safe, in-process stand-in for the subset of pymongo's Collection API used by
+    the stores in this repo. Meant for tests, benchmarks and local stress runs.
+    """
+
+    def __init__(self, name: str = "local"):
+        self.name = name
+        self._docs: dict = {}
+        self._lock = threading.RLock()
+
+    def _find(self, query: dict | None) -> list[dict]:
+        doc_id = (query or {}).get("_id", _MISSING)
+        if doc_id is not _MISSING and not isinstance(doc_id, dict):
+            doc = self._docs.get(doc_id)
+            return [doc] if doc is not None and _matches(doc, query) else []
+        return [doc for doc in self._docs.values() if _matches(doc, query or {})]
+
+    def create_index(self, keys, **kwargs) -> str:
+        return "_".join(f"{key}_{direction}" for key, direction in keys)
+
+    def insert_one(self, doc: dict):
+        with self._lock:
+            doc = copy.deepcopy(doc)
+            doc.setdefault("_id", ObjectId())
+            if doc["_id"] in self._docs:
+                raise DuplicateKeyError(f"duplicate _id {doc['_id']!r}")
+            self._docs[doc["_id"]] = doc
+            return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    def find(self, query: dict | None = None, projection: dict | None = None) -> LocalCursor:
+        with self._lock:
+            return LocalCursor(_project(doc, projection) for doc in self._find(query))
+
+    def find_one(self, query: dict | None = None, projection: dict | None = None) -> dict | None:
+        with self._lock:
+            docs = self._find(query)
+            return _project(docs[0], projection) if docs else None
+
+    def count_documents(self, query: dict, limit: int = 0) -> int:
+        with self._lock:
+            count = len(self._find(query))
+            return min(count, limit) if limit else count
+
+    def distinct(self, key: str, query: dict | None = None) -> list:
+        with self._lock:
+            values = []
+            for doc in self._find(query):
+                value = _get_path(doc, key)
+                if value is not _MISSING and value not in values:
+                    values.append(value)
+            return values
+
+    def update_one(self, query: dict, update: dict, upsert: bool = False):
+        with self._lock:
+            docs = self._find(query)
+            if docs:
+                _apply_update(docs[0], update)
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+            if not upsert:
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+            doc = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+            _apply_update(doc, {key: value for key, value in update.items() if key != "$setOnInsert"})
+            _apply_update(doc, {"$set": update.get("$setOnInsert", {})})
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=self.insert_one(doc).inserted_id)
+
+    def update_many(self, query: dict, update: dict):
+        with self._lock:
+            docs = self._find(query)
+            for doc in docs:
+                _apply_update(doc, update)
+            return SimpleNamespace(matched_count=len(docs), modified_count=len(docs))
+
+    def replace_one(self, query: dict, replacement: dict, upsert: bool = False):
+        with self._lock:
+            docs = self._find(query)
+            if docs:
+                replacement = copy.deepcopy(replacement)
+                replacement["_id"] = docs[0]["_id"]
+                self._docs[replacement["_id"]] = replacement
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+            if not upsert:
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=self.insert_one(replacement).inserted_id)
+
+    def find_one_and_update(self, query: dict, update: dict, upsert: bool = False,
+                            return_document=ReturnDocument.BEFORE, projection: dict | None = None):
+        with self._lock:
+            docs = self._find(query)
+            before = copy.deepcopy(docs[0]) if docs else None
+            result = self.update_one(query, update, upsert=upsert)
+            if return_document == ReturnDocument.BEFORE:
+                return _project(before, projection) if before else None
+            doc_id = docs[0]["_id"] if docs else result.upserted_id
+            return _project(self._docs[doc_id], projection) if doc_id is not None else None
+
+    def delete_one(self, query: dict):
+        with self._lock:
+            docs = self._find(query)
+            if docs:
+                del self._docs[docs[0]["_id"]]
+            return SimpleNamespace(deleted_count=len(docs[:1]))
+
+    def delete_many(self, query: dict):
+        with self._lock:
+            docs = self._find(query)
+            for doc in docs:
+                del self._docs[doc["_id"]]
+            return SimpleNamespace(deleted_count=len(docs))
+
+    def bulk_write(self, requests: list, ordered: bool = True):
+        """
+        Supports UpdateOne requests only.
+        """
+        matched = 0
+        with self._lock:
+            for request in requests:
+                matched += self.update_one(request._filter, request._doc, upsert=request._upsert).matched_count
+        return SimpleNamespace(matched_count=matched, modified_count=matched, acknowledged=True)
+
+    def watch(self, *args, **kwargs):
+        raise OperationFailure("Change streams are not supported by LocalCollection")
@@ -1,9 +1,11 @@
 import data
 import datetime
 from datetime import datetime, timezone
-import pytz
 from pydantic import BaseModel
 
+import trading_calendar
+from trading_calendar import SESSION_ASSET_TYPES
+
 class Order(BaseModel):
     type: str
     ticker: str
@@ -11,32 +13,49 @@ class Order(BaseModel):
     fill_price: float
     timestamp: datetime
     status: str
+    # limit, stop and stop_limit orders only
+    limit_price: float | None = None
+    stop_price: float | None = None
 
-def get_market_open_close() -> tuple[datetime, datetime]:
-    eastern = pytz.timezone("America/New_York")
-    now = datetime.now(eastern)
-
-    market_open = eastern.localize(datetime(now.year, now.month, now.day, 4, 0))
-    market_close = eastern.localize(datetime(now.year, now.month, now.day, 20, 0))
+def get_market_open_close(at: datetime | None = None) -> tuple[datetime, datetime] | tuple[None, None]:
+    """
+    Returns the extended session bounds (UTC) of the day `at` falls on in New York, today by
+    default, or (None, None) if the exchange is closed that day.
+    """
+    day = trading_calendar.trading_day_at(at if at is not None else datetime.now(timezone.utc))
+    if day is None:
+        return None, None
+    return day.pre_open, day.post_close
 
-    return market_open.astimezone(pytz.utc), market_close.astimezone(pytz.utc)
+def is_market_open(asset_type: str, timestamp: datetime, latest_timestamp: datetime) -> bool:
+    """
+    True if a quote from `latest_timestamp` can be traded on at `timestamp`. Session-bound
+    assets (stocks, ETFs) need `timestamp` within today's extended session and a quote from
+    that session; everything else needs a quote from the same day.
+    """
+    if asset_type in SESSION_ASSET_TYPES:
+        day = trading_calendar.session_at(timestamp)
+        return day is not None and latest_timestamp >= day.pre_open
+    return latest_timestamp.date() == timestamp.date()
 
 def market_order(ticker: str, shares: int, timestamp: datetime) -> Order:
-    print(ticker, shares, timestamp)
-    latest, prev, asset_type = data.get_asset_info(ticker, extended_hours=True)
+    # closed sessions are known from the calendar, no quote needed
+    if not trading_calendar.is_open(timestamp) and data.get_asset_type(ticker) in SESSION_ASSET_TYPES:
+        return Order(type="market", ticker=ticker, shares=0, fill_price=0, timestamp=timestamp, status="Market is closed")
+    asset_info = data.get_asset_info(ticker, extended_hours=True)
+    return evaluate_market_order(ticker, shares, timestamp, asset_info)
+
+def evaluate_market_order(ticker: str, shares: int, timestamp: datetime, asset_info: tuple) -> Order:
+    """
+    Fills a market order against an already fetched `data.get_asset_info` result.
+    """
+    latest, prev, asset_type = asset_info
     latest_price, latest_timestamp = latest
-    print(latest_price, latest_timestamp)
-    market_open, market_close = get_market_open_close()
     
     if latest_price is None:
         return Order(type="market", ticker=ticker, shares=0, fill_price=0, timestamp=timestamp, status="Invalid ticker")
-        
-    timestamp_date = latest_timestamp.date()
-    current_date = timestamp.date()
 
-    if timestamp_date != current_date:
-        return Order(type="market", ticker=ticker, shares=0, fill_price=0, timestamp=timestamp, status="Market is closed")
-    elif asset_type == "EQUITY" and (timestamp < market_open or timestamp > market_close):
+    if not is_market_open(asset_type, timestamp, latest_timestamp):
         return Order(type="market", ticker=ticker, shares=0, fill_price=0, timestamp=timestamp, status="Market is closed")
     elif timestamp.replace(second=0, microsecond=0) > latest_timestamp.replace(second=0, microsecond=0):
         return Order(type="market", ticker=ticker, shares=shares, fill_price=0, timestamp=timestamp, status="Reconciliation")
@@ -0,0 +1,153 @@
+import itertools
+import threading
+from bisect import insort
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+
+from instrumentation import timed
+from order import Order
+
+def _entry(account: str, transaction: str, order: Order, entry_id) -> dict:
+    return {
+        "_id": entry_id,
+        "account": account,
+        "transaction": transaction,
+        "ticker": order.ticker.upper(),
+        "submitted_at": order.timestamp,
+        "order": order,
+    }
+
+class MongoPendingOrderStore:
+    """
+    Durable queue of orders waiting for reconciliation, indexed by ticker and submission time.
+
+    Entries are dicts with `_id`, `account`, `transaction`, `ticker`, `submitted_at` and `order`.
+    """
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("ticker", ASCENDING), ("submitted_at", ASCENDING)])
+        self.collection.create_index([("submitted_at", ASCENDING)])
+
+    @staticmethod
+    def _from_document(doc: dict) -> dict:
+        order = Order(**doc["order"])
+        if order.timestamp.tzinfo is None:
+            order.timestamp = order.timestamp.replace(tzinfo=timezone.utc)
+        return _entry(doc["account"], doc["transaction"], order, doc["_id"])
+
+    @timed("db_seconds", op="pending_add")
+    def add(self, account: str, transaction: str, order: Order) -> ObjectId:
+        doc = _entry(account, transaction, order, ObjectId())
+        doc["order"] = order.model_dump()
+        self.collection.insert_one(doc)
+        return doc["_id"]
+
+    @timed("db_seconds", op="pending_tickers")
+    def tickers(self) -> list[str]:
+        return self.collection.distinct("ticker")
+
+    @timed("db_seconds", op="pending_for_ticker")
+    def for_ticker(self, ticker: str) -> list[dict]:
+        cursor = self.collection.find({"ticker": ticker.upper()}).sort("submitted_at", ASCENDING)
+        return [self._from_document(doc) for doc in cursor]
+
+    @timed("db_seconds", op="pending_all")
+    def all(self) -> list[dict]:
+        return [self._from_document(doc) for doc in self.collection.find().sort("submitted_at", ASCENDING)]
+
+    @timed("db_seconds", op="pending_remove")
+    def remove(self, entry_ids: list) -> None:
+        if entry_ids:
+            self.collection.delete_many({"_id": {"$in": list(entry_ids)}})
+
+    @timed("db_seconds", op="pending_claim")
+    def claim(self, entry_id) -> bool:
+        """
+        Atomically removes one entry; only the caller that gets True may process it.
+        """
+        return self.collection.delete_one({"_id": entry_id}).deleted_count == 1
+
+    @timed("db_seconds", op="pending_restore")
+    def restore(self, entry: dict) -> None:
+        """
+        Puts back a claimed entry that could not be processed, under the same id.
+        """
+        doc = _entry(entry["account"], entry["transaction"], entry["order"], entry["_id"])
+        doc["order"] = entry["order"].model_dump()
+        self.collection.insert_one(doc)
+
+    @timed("db_seconds", op="pending_count")
+    def count(self) -> int:
+        return self.collection.count_documents({})
+
+class InMemoryPendingOrderStore:
+    """
+    Local stand-in for MongoPendingOrderStore with the same interface, for tests and benchmarks.
+    """
+
+    def __init__(self):
+        self._entries: dict[int, dict] = {}
+        self._by_ticker: dict[str, list[tuple[datetime, int]]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self) -> None:
+        pass
+
+    def add(self, account: str, transaction: str, order: Order) -> int:
+        with self._lock:
+            entry = _entry(account, transaction, order, next(self._ids))
+            self._entries[entry["_id"]] = entry
+            insort(self._by_ticker.setdefault(entry["ticker"], []), (entry["submitted_at"], entry["_id"]))
+            return entry["_id"]
+
+    def tickers(self) -> list[str]:
+        with self._lock:
+            return list(self._by_ticker)
+
+    def for_ticker(self, ticker: str) -> list[dict]:
+        with self._lock:
+            return [self._entries[entry_id] for _, entry_id in self._by_ticker.get(ticker.upper(), [])]
+
+    def all(self) -> list[dict]:
+        with self._lock:
+            return sorted(self._entries.values(), key=lambda entry: (entry["submitted_at"], entry["_id"]))
+
+    def _remove(self, entry_ids: list) -> int:
+        removed = set()
+        count = 0
+        for entry_id in entry_ids:
+            entry = self._entries.pop(entry_id, None)
+            if entry is not None:
+                removed.add(entry["ticker"])
+                count += 1
+        for ticker in removed:
+            remaining = [key for key in self._by_ticker[ticker] if key[1] in self._entries]
+            if remaining:
+                self._by_ticker[ticker] = remaining
+            else:
+                del self._by_ticker[ticker]
+        return count
+
+    def remove(self, entry_ids: list) -> None:
+        with self._lock:
+            self._remove(entry_ids)
+
+    def claim(self, entry_id) -> bool:
+        with self._lock:
+            return self._remove([entry_id]) == 1
+
+    def restore(self, entry: dict) -> None:
+        with self._lock:
+            entry = _entry(entry["account"], entry["transaction"], entry["order"], entry["_id"])
+            self._entries[entry["_id"]] = entry
+            insort(self._by_ticker.setdefault(entry["ticker"], []), (entry["submitted_at"], entry["_id"]))
+
+    def count(self) -> int:
+        return len(self._entries)
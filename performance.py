@@ -1,7 +1,9 @@
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import pandas as pd
 import io
+from lazy_imports import lazy_import
+
+mfigure = lazy_import("matplotlib.figure")
+mdates = lazy_import("matplotlib.dates")
+pd = lazy_import("pandas")
 
 def get_history_plot(account_name: str, account_history: dict) -> io.BytesIO:
     sorted_dates = sorted(account_history.keys())
@@ -9,8 +11,8 @@ def get_history_plot(account_name: str, account_history: dict) -> io.BytesIO:
     
     dates = pd.to_datetime(sorted_dates)
 
-    plt.figure(figsize=(8, 4), facecolor="black")
-    ax = plt.gca()
+    fig = mfigure.Figure(figsize=(8, 4), facecolor="black")
+    ax = fig.subplots()
     ax.set_facecolor("black")
 
     ax.plot(dates, values, marker="o", linestyle="-", color="cyan", label="Account Value")
@@ -24,13 +26,12 @@ def get_history_plot(account_name: str, account_history: dict) -> io.BytesIO:
     ax.grid(True, linestyle="--", alpha=0.5, color="white")
 
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-    plt.xticks(rotation=45)
+    ax.tick_params(axis="x", labelrotation=45)
 
-    plt.tight_layout()
+    fig.tight_layout()
     buf = io.BytesIO()
-    plt.savefig(buf, format="png", facecolor=plt.gcf().get_facecolor())
+    fig.savefig(buf, format="png", facecolor=fig.get_facecolor())
     buf.seek(0)
-    plt.close()
     return buf
 
 def get_returns_plot(account_name: str, account_history: dict) -> io.BytesIO:
@@ -39,8 +40,8 @@ def get_returns_plot(account_name: str, account_history: dict) -> io.BytesIO:
     
     dates = pd.to_datetime(sorted_dates)
 
-    plt.figure(figsize=(8, 4), facecolor="black")
-    ax = plt.gca()
+    fig = mfigure.Figure(figsize=(8, 4), facecolor="black")
+    ax = fig.subplots()
     ax.set_facecolor("black")
 
     ax.plot(dates, returns, marker="o", linestyle="-", color="cyan", label="Returns")
@@ -54,18 +55,17 @@ def get_returns_plot(account_name: str, account_history: dict) -> io.BytesIO:
     ax.grid(True, linestyle="--", alpha=0.5, color="white")
 
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-    plt.xticks(rotation=45)
+    ax.tick_params(axis="x", labelrotation=45)
 
-    plt.tight_layout()
+    fig.tight_layout()
     buf = io.BytesIO()
-    plt.savefig(buf, format="png", facecolor=plt.gcf().get_facecolor())
+    fig.savefig(buf, format="png", facecolor=fig.get_facecolor())
     buf.seek(0)
-    plt.close()
     return buf
 
 def get_multi_returns_plot(accounts: dict) -> io.BytesIO:
-    plt.figure(figsize=(10, 5), facecolor="black")
-    ax = plt.gca()
+    fig = mfigure.Figure(figsize=(10, 5), facecolor="black")
+    ax = fig.subplots()
     ax.set_facecolor("black")
 
     colors = ["cyan", "orange", "lime", "magenta", "yellow"]
@@ -88,13 +88,12 @@ def get_multi_returns_plot(accounts: dict) -> io.BytesIO:
     ax.grid(True, linestyle="--", alpha=0.5, color="white")
 
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-    plt.xticks(rotation=45)
+    ax.tick_params(axis="x", labelrotation=45)
 
     ax.legend(facecolor="black", edgecolor="white", labelcolor="white")
 
-    plt.tight_layout()
+    fig.tight_layout()
     buf = io.BytesIO()
-    plt.savefig(buf, format="png", facecolor=plt.gcf().get_facecolor())
+    fig.savefig(buf, format="png", facecolor=fig.get_facecolor())
     buf.seek(0)
-    plt.close()
     return buf
\ No newline at end of file
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import Callable, Iterable
+
+import async_facade
+import data
+from lazy_imports import lazy_import
+from price_table import PRICE_COLUMNS, PriceTable
+
+pd = lazy_import("pandas")
+
+class YahooPollingSource:
+    """
+    Polls the whole watchlist with one batched download per round.
+    """
+
+    def __init__(self, extended_hours: bool = True):
+        self.extended_hours = extended_hours
+
+    async def poll(self, tickers: list[str]) -> pd.DataFrame:
+        return await async_facade.run_blocking(data.fetch_asset_infos, tickers, self.extended_hours)
+
+class ReplaySource:
+    """
+    Replays recorded ticks from a CSV file with columns
+    ticker,timestamp,price[,prev_close], one timestamp group per poll.
+    Timestamps are ISO 8601; naive timestamps are taken as UTC.
+    """
+
+    def __init__(self, path: str, loop: bool = False):
+        self.path = path
+        self.loop = loop
+        self._rounds = self._load(path)
+        self._position = 0
+
+    @staticmethod
+    def _load(path: str) -> list[list[dict]]:
+        rounds: dict[datetime, list[dict]] = {}
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                timestamp = datetime.fromisoformat(row["timestamp"])
+                if timestamp.tzinfo is None:
+                    timestamp = timestamp.replace(tzinfo=timezone.utc)
+                prev_close = row.get("prev_close")
+                rounds.setdefault(timestamp, []).append({
+                    "ticker": row["ticker"].upper(),
+                    "price": float(row["price"]),
+                    "timestamp": timestamp,
+                    "prev_close": float(prev_close) if prev_close else math.nan,
+                    "prev_timestamp": None,
+                })
+        return [rounds[timestamp] for timestamp in sorted(rounds)]
+
+    @property
+    def exhausted(self) -> bool:
+        return not self.loop and self._position >= len(self._rounds)
+
+    async def poll(self, tickers: list[str]) -> pd.DataFrame:
+        if not self._rounds or self.exhausted:
+            return pd.DataFrame(columns=PRICE_COLUMNS, index=pd.Index([], name="ticker"))
+        rows = self._rounds[self._position % len(self._rounds)]
+        self._position += 1
+        watched = {ticker.upper() for ticker in tickers}
+        rows = [row for row in rows if not watched or row["ticker"] in watched]
+        frame = pd.DataFrame(rows, columns=["ticker", *PRICE_COLUMNS]).set_index("ticker")
+        return frame
+
+class PriceIngestor:
+    """
+    Background task that keeps a PriceTable current for the watchlist (tickers held or
+    pending across accounts) by polling a source every `interval` seconds.
+    """
+
+    def __init__(self, source, table: PriceTable, watchlist: Callable[[], Iterable[str]], interval: float = 15.0):
+        self.source = source
+        self.table = table
+        self.watchlist = watchlist
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+        self.rounds = 0
+        self.errors = 0
+        self.last_round_ms = 0.0
+        self.last_watchlist_size = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> int:
+        start = time.perf_counter()
+        tickers = sorted({ticker.upper() for ticker in await async_facade.run_blocking(self.watchlist)})
+        self.last_watchlist_size = len(tickers)
+        if not tickers:
+            return 0
+        updated = self.table.update_frame(await self.source.poll(tickers))
+        self.rounds += 1
+        self.last_round_ms = (time.perf_counter() - start) * 1000
+        return updated
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"Price ingest round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "rounds": self.rounds,
+            "errors": self.errors,
+            "last_round_ms": self.last_round_ms,
+            "watchlist": self.last_watchlist_size,
+        }
+
+def make_source(spec: str):
+    """
+    Builds a source from a PRICE_INGEST spec: "yahoo" or "replay:<path>".
+    Returns None if ingest is disabled.
+    """
+    if not spec or spec == "off":
+        return None
+    if spec == "yahoo":
+        return YahooPollingSource()
+    if spec.startswith("replay:"):
+        return ReplaySource(spec.removeprefix("replay:"), loop=True)
+    raise ValueError(f"Unknown PRICE_INGEST source: {spec}")
+
+PRICE_INGEST_INTERVAL = float(os.getenv("PRICE_INGEST_INTERVAL", "15"))
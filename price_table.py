@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable
+
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+PRICE_COLUMNS = ["price", "timestamp", "prev_close", "prev_timestamp"]
+
+class PriceTick:
+    __slots__ = ("price", "timestamp", "prev_close", "prev_timestamp", "received_at")
+
+    def __init__(self, price: float, timestamp: datetime, prev_close: float | None,
+                 prev_timestamp: datetime | None, received_at: float):
+        self.price = price
+        self.timestamp = timestamp
+        self.prev_close = prev_close
+        self.prev_timestamp = prev_timestamp
+        self.received_at = received_at
+
+class PriceTable:
+    """
+    In-memory last-price state per ticker, written by a PriceIngestor and read by the
+    quote, order-fill and valuation paths. A tick is only served while it is younger
+    than `max_age` seconds, after which callers fall back to fetching.
+    """
+
+    def __init__(self, max_age: float = 60.0):
+        self.max_age = max_age
+        self._ticks: dict[str, PriceTick] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+
+    def update(self, ticker: str, price: float, timestamp: datetime, prev_close: float | None = None,
+               prev_timestamp: datetime | None = None) -> None:
+        ticker = ticker.upper()
+        with self._lock:
+            previous = self._ticks.get(ticker)
+            if previous is not None:
+                if previous.timestamp is not None and timestamp is not None and timestamp < previous.timestamp:
+                    return
+                if prev_close is None:
+                    prev_close, prev_timestamp = previous.prev_close, previous.prev_timestamp
+            self._ticks[ticker] = PriceTick(price, timestamp, prev_close, prev_timestamp, time.monotonic())
+            self.updates += 1
+
+    def update_frame(self, frame: pd.DataFrame) -> int:
+        """
+        Applies rows shaped like data.get_asset_infos; rows without a price are skipped.
+
+        Returns:
+            Number of tickers updated
+        """
+        updated = 0
+        for ticker, row in frame.iterrows():
+            if pd.isna(row["price"]):
+                continue
+            self.update(
+                ticker,
+                float(row["price"]),
+                _to_datetime(row["timestamp"]),
+                None if pd.isna(row["prev_close"]) else float(row["prev_close"]),
+                _to_datetime(row["prev_timestamp"]),
+            )
+            updated += 1
+        return updated
+
+    def get(self, ticker: str) -> PriceTick | None:
+        tick = self._ticks.get(ticker.upper())
+        if tick is None or time.monotonic() - tick.received_at > self.max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tick
+
+    def frame(self, tickers: Iterable[str]) -> tuple[pd.DataFrame, list[str]]:
+        """
+        Returns:
+            (DataFrame shaped like data.get_asset_infos for the fresh tickers,
+             list of tickers that are missing or stale)
+        """
+        rows = {}
+        missing = []
+        for ticker in tickers:
+            tick = self.get(ticker)
+            if tick is None:
+                missing.append(ticker)
+            else:
+                rows[ticker] = (tick.price, tick.timestamp, tick.prev_close, tick.prev_timestamp)
+        frame = pd.DataFrame.from_dict(rows, orient="index", columns=PRICE_COLUMNS)
+        frame.index.name = "ticker"
+        return frame, missing
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ticks.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "tickers": len(self._ticks),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "updates": self.updates,
+        }
+
+def _to_datetime(value) -> datetime | None:
+    if value is None or pd.isna(value):
+        return None
+    return pd.Timestamp(value).tz_convert(timezone.utc).to_pydatetime()
+
+price_table = PriceTable(max_age=float(os.getenv("PRICE_TABLE_MAX_AGE", "60")))
@@ -0,0 +1,139 @@
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable
+
+BAR_SECONDS = 60
+
+class _InFlight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class QuoteCache:
+    """
+    Thread-safe TTL + LRU cache for upstream market data lookups.
+
+    Entries expire after `ttl` seconds or at the next bar boundary, whichever
+    comes first, so a cached quote never outlives the 1-minute bar it was read from.
+    Lookups that pass an explicit `ttl` (e.g. slow-changing metadata) are not bar aligned.
+    Concurrent misses for the same key are coalesced into a single fetch.
+    """
+
+    def __init__(self, ttl: float = BAR_SECONDS, max_entries: int = 1024, align_to_bar: bool = True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.align_to_bar = align_to_bar
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._in_flight: dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def _expiry(self, now: float, ttl: float | None) -> float:
+        if ttl is not None:
+            return now + ttl
+        expires_at = now + self.ttl
+        if self.align_to_bar:
+            next_bar = (now // BAR_SECONDS + 1) * BAR_SECONDS
+            expires_at = min(expires_at, next_bar)
+        return expires_at
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any], ttl: float | None = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                in_flight = _InFlight()
+                self._in_flight[key] = in_flight
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.coalesced += 1
+
+        if not owner:
+            in_flight.event.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.value
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            in_flight.error = e
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.event.set()
+            raise
+
+        in_flight.value = value
+        with self._lock:
+            self._entries[key] = (self._expiry(time.time(), ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            del self._in_flight[key]
+        in_flight.event.set()
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+quote_cache = QuoteCache(
+    ttl=float(os.getenv("QUOTE_CACHE_TTL", BAR_SECONDS)),
+    max_entries=int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "1024")),
+)
+
+def cached(cache: QuoteCache = quote_cache, ttl: float | None = None):
+    """
+    Caches a `(ticker, ...)` lookup keyed by function name, upper-cased ticker
+    and the remaining bound arguments (e.g. the extended hours flag).
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(ticker: str, *args, **kwargs):
+            bound = signature.bind(ticker, *args, **kwargs)
+            bound.apply_defaults()
+            rest = tuple(bound.arguments.values())[1:]
+            key = (func.__name__, ticker.upper(), rest)
+            return cache.get_or_fetch(key, lambda: func(ticker, *args, **kwargs), ttl)
+        return wrapper
+    return decorator
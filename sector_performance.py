@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import io
+import math
+
+import data
+from lazy_imports import lazy_import
+from quote_cache import quote_cache
+from sectors import sectors
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+style = lazy_import("matplotlib.style")
+mfigure = lazy_import("matplotlib.figure")
+mcolors = lazy_import("matplotlib.colors")
+
+# day changes beyond this many percent get the strongest colour
+HEATMAP_RANGE = 3.0
+
+def compute_sector_performance(sector_names: list[str], asset_infos: pd.DataFrame) -> dict:
+    """
+    Equal-weighted day change per sector, computed over flat ticker arrays with bincount
+    instead of per-sector loops.
+
+    Returns:
+        {"sectors": [{name, change, advancers, decliners, count, best, worst}] sorted by change,
+         "tickers": {sector: [(ticker, change)] sorted by change}, "as_of": latest quote time}
+        best and worst are (ticker, change) or None; change is NaN for a sector without data
+    """
+    tickers = [ticker for name in sector_names for ticker in sectors[name]]
+    codes = np.array([code for code, name in enumerate(sector_names) for _ in sectors[name]], dtype=int)
+    infos = asset_infos.reindex([ticker.upper() for ticker in tickers])
+    price = infos["price"].to_numpy(dtype=float)
+    prev_close = infos["prev_close"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (price - prev_close) / prev_close * 100
+
+    valid = np.isfinite(change)
+    valid_codes = codes[valid]
+    valid_change = change[valid]
+    valid_tickers = np.array(tickers, dtype=object)[valid]
+    size = len(sector_names)
+    counts = np.bincount(valid_codes, minlength=size)
+    sums = np.bincount(valid_codes, weights=valid_change, minlength=size)
+    advancers = np.bincount(valid_codes[valid_change > 0], minlength=size)
+    decliners = np.bincount(valid_codes[valid_change < 0], minlength=size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+
+    # sorted by sector, then change: each sector is a contiguous run from worst to best
+    order = np.lexsort((valid_change, valid_codes))
+    starts = np.searchsorted(valid_codes[order], np.arange(size), side="left")
+    ends = np.searchsorted(valid_codes[order], np.arange(size), side="right")
+
+    summary = []
+    by_sector = {}
+    for code, name in enumerate(sector_names):
+        run = order[starts[code]:ends[code]][::-1]
+        ranked = [(str(valid_tickers[i]), float(valid_change[i])) for i in run]
+        by_sector[name] = ranked
+        summary.append({
+            "name": name,
+            "change": float(means[code]),
+            "advancers": int(advancers[code]),
+            "decliners": int(decliners[code]),
+            "count": int(counts[code]),
+            "best": ranked[0] if ranked else None,
+            "worst": ranked[-1] if ranked else None,
+        })
+    summary.sort(key=lambda row: -math.inf if math.isnan(row["change"]) else row["change"], reverse=True)
+
+    timestamps = infos["timestamp"].dropna()
+    as_of = timestamps.max().isoformat() if not timestamps.empty else None
+    return {"sectors": summary, "tickers": by_sector, "as_of": as_of}
+
+def get_sector_performance(sector: str | None = None) -> dict:
+    """
+    Sector performance for one sector, or every sector if `sector` is None, from a single
+    batched quote fetch for all their tickers. Cached until the next 1-minute bar.
+
+    Raises:
+        KeyError: on an unknown sector
+    """
+    sector_names = [sector] if sector is not None else list(sectors)
+    for name in sector_names:
+        if name not in sectors:
+            raise KeyError(name)
+
+    def compute() -> dict:
+        tickers = [ticker for name in sector_names for ticker in sectors[name]]
+        return compute_sector_performance(sector_names, data.get_asset_infos(tickers))
+
+    return quote_cache.get_or_fetch(("sector_performance", sector), compute)
+
+def render_sector_heatmap(performance: dict, title: str) -> bytes:
+    """
+    One row per sector (best sector on top) with its tickers ordered from best to worst,
+    coloured by day change. A single sector is wrapped into a grid of tiles instead.
+    """
+    rows = [row for row in performance["sectors"] if row["count"]]
+    single = len(performance["tickers"]) == 1
+    ranked = [performance["tickers"][row["name"]] for row in rows]
+    if single and ranked:
+        tickers = ranked[0]
+        columns = math.ceil(math.sqrt(len(tickers) * 2))
+        ranked = [tickers[i:i + columns] for i in range(0, len(tickers), columns)]
+    columns = max((len(row) for row in ranked), default=1)
+
+    grid = np.full((max(len(ranked), 1), columns), np.nan)
+    for r, row in enumerate(ranked):
+        grid[r, :len(row)] = [change for _, change in row]
+
+    with style.context("dark_background"):
+        fig = mfigure.Figure(figsize=(max(8, columns * 0.9), max(3, len(ranked) * 0.65 + 1.2)))
+        ax = fig.subplots()
+        ax.set_facecolor("black")
+
+        norm = mcolors.TwoSlopeNorm(vmin=-HEATMAP_RANGE, vcenter=0, vmax=HEATMAP_RANGE)
+        ax.imshow(np.ma.masked_invalid(np.clip(grid, -HEATMAP_RANGE, HEATMAP_RANGE)), cmap="RdYlGn",
+                  norm=norm, aspect="auto")
+        for r, row in enumerate(ranked):
+            for c, (ticker, change) in enumerate(row):
+                ax.text(c, r, f"{ticker}\n{change:+.1f}%", ha="center", va="center", fontsize=7, color="black")
+
+        ax.set_xticks([])
+        if single:
+            ax.set_yticks([])
+        else:
+            ax.set_yticks(range(len(rows)))
+            ax.set_yticklabels([f"{row['name']} {row['change']:+.2f}%" for row in rows])
+        ax.tick_params(colors="white")
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+
+        ax.set_title(title, color="white", fontsize=14)
+        fig.tight_layout()
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", facecolor=fig.get_facecolor())
+    return buf.getvalue()
@@ -0,0 +1,187 @@
+"""
+Runs several worker processes against shared collections to check that scheduled-job
+leadership and pending-order reconciliation are coordinated so work happens once.
+
+The collections are LocalCollections hosted in a multiprocessing manager, so every
+worker sees the same documents, like separate bot processes sharing one Mongo. Each
+worker runs the LeaderLease election; the leader drains pending orders with the same
+claim-then-fill path as the bot and runs a "daily" job once per period via claim_job_run.
+Halfway through, the current leader is stopped (SIGTERM, or SIGKILL with --hard-kill)
+and a standby has to take over.
+
+    python shard_harness.py --workers 3 --seconds 12 --orders 400
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import time
+from datetime import datetime, timezone
+from multiprocessing.managers import BaseManager
+
+from pymongo.errors import DuplicateKeyError
+
+from account_repository import AccountRepository
+from fills import fill_order
+from leader import LeaderLease, claim_job_run
+from local_mongo import LocalCollection
+from order import Order
+from pending_orders import MongoPendingOrderStore
+from storage import AccountStore
+
+COLLECTIONS = ("accounts", "meta", "pending_orders", "leases", "job_runs", "fill_log", "job_log", "term_log")
+STARTING_CASH = 1_000_000.0
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA"]
+
+class CollectionManager(BaseManager):
+    pass
+
+CollectionManager.register("LocalCollection", LocalCollection)
+
+def worker(index: int, collections: dict, ttl: float, job_period: float, deadline: float) -> None:
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+
+    owner = f"worker-{index}:{os.getpid()}"
+    lease = LeaderLease(collections["leases"], "scheduler", owner=owner, ttl=ttl, margin=ttl / 4)
+    repository = AccountRepository(AccountStore(collections["accounts"]), collections["meta"], check_interval=0)
+    pending = MongoPendingOrderStore(collections["pending_orders"])
+    last_renew = 0.0
+
+    while not stopping and time.time() < deadline:
+        if time.monotonic() - last_renew >= ttl / 3:
+            was_leader = lease.is_leader
+            lease.try_acquire()
+            last_renew = time.monotonic()
+            if lease.is_leader and not was_leader:
+                collections["term_log"].insert_one({"_id": lease.term, "owner": owner, "at": time.time()})
+
+        if not lease.is_leader:
+            time.sleep(0.05)
+            continue
+
+        run_key = str(int(time.time() // job_period))
+        if claim_job_run(collections["job_runs"], "daily_report", run_key, owner, lease.term):
+            collections["job_log"].insert_one({"run_key": run_key, "owner": owner, "term": lease.term})
+
+        for entry in pending.all():
+            if stopping or not lease.is_leader:
+                break
+            if not pending.claim(entry["_id"]):
+                continue
+            status = fill_order(repository, entry["account"], entry["transaction"], entry["order"])
+            try:
+                collections["fill_log"].insert_one({"_id": entry["_id"], "owner": owner, "status": status})
+            except DuplicateKeyError:
+                print(f"DUPLICATE fill of {entry['_id']} by {owner}", flush=True)
+        time.sleep(0.02)
+
+    if lease.is_leader:
+        lease.release()
+
+def current_leader(leases) -> str | None:
+    doc = leases.find_one({"_id": "scheduler"})
+    if doc is None or doc["expires_at"] < time.time():
+        return None
+    return doc["owner"]
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=12.0)
+    parser.add_argument("--orders", type=int, default=400)
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--ttl", type=float, default=2.0, help="leader lease TTL in seconds")
+    parser.add_argument("--job-period", type=float, default=1.0, help="seconds per simulated daily-report window")
+    parser.add_argument("--hard-kill", action="store_true", help="SIGKILL the leader instead of SIGTERM")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with CollectionManager() as manager:
+        collections = {name: manager.LocalCollection(name) for name in COLLECTIONS}
+        repository = AccountRepository(AccountStore(collections["accounts"]), collections["meta"], check_interval=0)
+        names = [f"account-{i}" for i in range(args.accounts)]
+        for name in names:
+            repository.create(name, {
+                "cash": STARTING_CASH,
+                "positions": {},
+                "unmatched_trades": {},
+                "account_history": {"2024-01-01": {"value": STARTING_CASH, "return": 0}},
+            })
+        pending = MongoPendingOrderStore(collections["pending_orders"])
+
+        start = time.time()
+        deadline = start + args.seconds
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=worker, args=(i, collections, args.ttl, args.job_period, deadline))
+            for i in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+
+        # feed orders for the first 70% of the run, stop the leader halfway
+        added = 0
+        killed = None
+        feed_until = start + args.seconds * 0.7
+        while time.time() < feed_until:
+            target = int(args.orders * (time.time() - start) / (feed_until - start))
+            while added < min(target, args.orders):
+                order = Order(type="market", ticker=rng.choice(TICKERS), shares=rng.randint(1, 10),
+                              fill_price=round(rng.uniform(10, 500), 2), timestamp=datetime.now(timezone.utc),
+                              status="Filled")
+                pending.add(rng.choice(names), "BUY", order)
+                added += 1
+            if killed is None and time.time() - start >= args.seconds / 2:
+                leader = current_leader(collections["leases"])
+                if leader is not None:
+                    pid = int(leader.rsplit(":", 1)[1])
+                    os.kill(pid, signal.SIGKILL if args.hard_kill else signal.SIGTERM)
+                    killed = leader
+                    print(f"stopped leader {leader}")
+            time.sleep(0.05)
+        while added < args.orders:
+            order = Order(type="market", ticker=rng.choice(TICKERS), shares=1, fill_price=100.0,
+                          timestamp=datetime.now(timezone.utc), status="Filled")
+            pending.add(rng.choice(names), "BUY", order)
+            added += 1
+
+        for process in processes:
+            process.join(args.seconds + 10)
+
+        fills = collections["fill_log"].find()
+        job_runs = collections["job_log"].find()
+        terms = collections["term_log"].find()
+        left = pending.count()
+        run_keys = [run["run_key"] for run in job_runs]
+        duplicate_runs = len(run_keys) - len(set(run_keys))
+        owners = {term["_id"]: term["owner"] for term in terms}
+
+        accounts = AccountStore(collections["accounts"]).load_all()
+        filled = [fill for fill in fills if fill["status"] == "Filled"]
+        spent = STARTING_CASH * len(names) - sum(account["cash"] for account in accounts.values())
+        versions = sum(account["version"] for account in accounts.values())
+        lost = added - len(fills) - left
+
+        print(f"orders added {added}, filled {len(filled)} of {len(fills)} processed, {left} left pending, {lost} lost")
+        print(f"leadership terms: {len(owners)} ({', '.join(f'{t}:{o}' for t, o in sorted(owners.items()))})")
+        print(f"job runs: {len(run_keys)} over {len(set(run_keys))} windows, {duplicate_runs} duplicated")
+        print(f"account versions {versions}, cash spent {spent:,.2f}")
+
+        ok = duplicate_runs == 0 and versions == len(filled) and left == 0
+        ok = ok and (lost == 0 or args.hard_kill)
+        if lost and args.hard_kill:
+            print(f"note: {lost} orders claimed by the killed leader were not filled (claims are at-most-once)")
+        print("coordination OK" if ok else "coordination FAILED")
+        return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import math
+import time
+
+from pymongo.errors import PyMongoError
+
+import data
+import valuation
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+SNAPSHOT_RETRIES = 3
+
+def _before(history: dict, date: str) -> dict:
+    return {day: point for day, point in history.items() if day < date}
+
+def _unpriced(asset_infos: pd.DataFrame, tickers: list[str]) -> list[str]:
+    infos = asset_infos.reindex(tickers)
+    return [ticker for ticker, ok in zip(tickers, infos["price"].notna() | infos["prev_close"].notna()) if not ok]
+
+def fetch_prices(tickers: list[str], retries: int = SNAPSHOT_RETRIES, backoff: float = 1.0) -> pd.DataFrame:
+    """
+    Batched quotes for `tickers`. Tickers that come back without any price, or a fetch that
+    raises, are retried up to `retries` times with backoff, bypassing the quote cache so a
+    partial result cached for the current bar is not served again.
+
+    Returns:
+        DataFrame like data.get_asset_infos; tickers that never got a price have NaN values
+    """
+    infos = None
+    missing = list(tickers)
+    for attempt in range(retries + 1):
+        if not missing:
+            break
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        try:
+            fetched = data.get_asset_infos(missing) if infos is None else data.fetch_asset_infos(missing)
+        except Exception as e:
+            print(f"Snapshot price fetch failed (attempt {attempt + 1}): {e}")
+            continue
+        infos = fetched if infos is None else infos.combine_first(fetched)
+        missing = _unpriced(infos, missing)
+
+    if infos is None:
+        return pd.DataFrame(columns=["price", "timestamp", "prev_close", "prev_timestamp"],
+                            index=pd.Index(tickers, name="ticker"), dtype=float)
+    return infos
+
+def take_snapshot(repository, date: str, asset_infos: pd.DataFrame | None = None,
+                  retries: int = SNAPSHOT_RETRIES, backoff: float = 1.0) -> dict:
+    """
+    Values every account and appends its `account_history` point for `date`.
+
+    Accounts are read once from the repository cache without copying, priced with a
+    single batched fetch and valued together (valuation.value_accounts). The new points
+    are then written in one bulk write that only touches accounts without a point for
+    `date`. Writes that fail are retried with
+    backoff. If the job runs again for the same date, existing points are kept and the
+    day P&L is still measured against the point before `date`.
+
+    An account holding a ticker that could not be priced has no finite value. It is left
+    out of the write, so a later run for the same date can still record its point, since
+    a written point is never overwritten.
+
+    Returns:
+        {"valuations": {name: (positions_info, account_info)},
+         "points": {name: {value, return}}, "written": [...], "skipped": [...], "failed": [...],
+         "unpriced": {name: [tickers without a price]}}
+        valuations and points only contain accounts with a finite value
+    """
+    accounts = repository.view_all()
+    skipped = [name for name, account in accounts.items() if date in account["account_history"]]
+    for name in skipped:
+        # value against the previous point, not the one already written for this date
+        history = _before(accounts[name]["account_history"], date)
+        if history:
+            accounts[name] = {**accounts[name], "account_history": history}
+
+    tickers = sorted({ticker.upper() for account in accounts.values() for ticker in account["unmatched_trades"]})
+    if asset_infos is None:
+        asset_infos = fetch_prices(tickers, retries, backoff)
+    missing = set(_unpriced(asset_infos, tickers))
+
+    valuations = valuation.value_accounts(accounts, asset_infos, include_positions=False)
+    unpriced = {}
+    for name, (_, account_info) in list(valuations.items()):
+        if not math.isfinite(account_info["account_value"]):
+            unpriced[name] = sorted({ticker.upper() for ticker in accounts[name]["unmatched_trades"]} & missing)
+            del valuations[name]
+    if unpriced:
+        print(f"Snapshot for {date} left out accounts with unpriced tickers: "
+              + "; ".join(f"{name} ({', '.join(held) or 'no value'})" for name, held in unpriced.items()))
+
+    names = list(valuations)
+    account_values = np.array([valuations[name][1]["account_value"] for name in names], dtype=float)
+    starting_values = np.array(
+        [next(iter(accounts[name]["account_history"].values()))["value"] for name in names], dtype=float
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.round((account_values - starting_values) / starting_values * 100, 2)
+    points = {
+        name: {"value": float(account_values[row]), "return": float(returns[row])}
+        for row, name in enumerate(names)
+    }
+
+    pending = {name: points[name] for name in names if name not in skipped}
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        try:
+            failed = repository.append_history_many(date, pending)
+        except PyMongoError as e:
+            print(f"Snapshot write for {date} failed (attempt {attempt + 1}): {e}")
+            continue
+        pending = {name: pending[name] for name in failed}
+
+    failed = list(pending)
+    if failed:
+        print(f"Snapshot for {date} could not be written for: {', '.join(failed)}")
+    return {
+        "valuations": valuations,
+        "points": points,
+        "written": [name for name in names if name not in skipped and name not in pending],
+        "skipped": skipped,
+        "failed": failed,
+        "unpriced": unpriced,
+    }
@@ -0,0 +1,162 @@
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from instrumentation import timed
+
+ACCOUNT_FIELDS = ("cash", "positions", "unmatched_trades", "account_history")
+TICKER_KEYED_FIELDS = ("positions", "unmatched_trades")
+
+def encode_key(key: str) -> str:
+    """
+    Escapes characters Mongo does not allow in field paths (e.g. `SHOP.TO`).
+    """
+    return key.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+def decode_key(key: str) -> str:
+    return key.replace("%24", "$").replace("%2E", ".").replace("%25", "%")
+
+def _to_document(name: str, account: dict) -> dict:
+    doc = {"_id": name}
+    for field in ACCOUNT_FIELDS:
+        value = account[field]
+        if field in TICKER_KEYED_FIELDS:
+            value = {encode_key(ticker): item for ticker, item in value.items()}
+        doc[field] = value
+    doc["version"] = account.get("version", 0)
+    return doc
+
+def _from_document(doc: dict) -> dict:
+    account = {}
+    for field in ACCOUNT_FIELDS:
+        value = doc.get(field, {} if field != "cash" else 0)
+        if field in TICKER_KEYED_FIELDS:
+            value = {decode_key(ticker): item for ticker, item in value.items()}
+        account[field] = value
+    account["version"] = doc.get("version", 0)
+    return account
+
+class AccountStore:
+    """
+    Stores each account as its own document keyed by account name, so writes only
+    touch the account (and ticker) being changed.
+    """
+
+    def __init__(self, accounts: Collection, legacy: Collection | None = None):
+        self.accounts = accounts
+        self.legacy = legacy
+
+    @timed("db_seconds", op="load_all")
+    def load_all(self) -> dict:
+        return {doc["_id"]: _from_document(doc) for doc in self.accounts.find()}
+
+    @timed("db_seconds", op="load")
+    def load(self, name: str) -> dict | None:
+        doc = self.accounts.find_one({"_id": name})
+        return _from_document(doc) if doc else None
+
+    @timed("db_seconds", op="names")
+    def names(self) -> list[str]:
+        return [doc["_id"] for doc in self.accounts.find({}, {"_id": 1})]
+
+    @timed("db_seconds", op="exists")
+    def exists(self, name: str) -> bool:
+        return self.accounts.count_documents({"_id": name}, limit=1) > 0
+
+    @timed("db_seconds", op="create")
+    def create(self, name: str, account: dict) -> bool:
+        try:
+            self.accounts.insert_one(_to_document(name, account))
+        except DuplicateKeyError:
+            return False
+        return True
+
+    @timed("db_seconds", op="delete")
+    def delete(self, name: str) -> bool:
+        return self.accounts.delete_one({"_id": name}).deleted_count > 0
+
+    @timed("db_seconds", op="record_fill")
+    def record_fill(self, name: str, ticker: str, cash_delta: float, position: int | None,
+                    lots: dict | None, pushed_lot: list | None = None,
+                    expected_version: int | None = None) -> bool:
+        """
+        Applies a filled order to one position: `$inc` on cash, then either `$push` of a
+        single new lot onto the ticker's ledger (with its running totals), `$set` of the
+        whole ledger document, or `$unset` once the position is closed.
+
+        With `expected_version`, the update only applies if the account has not been
+        filled since it was read, and the version is bumped.
+
+        Returns:
+            False if the account is missing or its version changed
+        """
+        key = encode_key(ticker)
+        query = {"_id": name}
+        update = {"$inc": {"cash": cash_delta, "version": 1}}
+        if expected_version is not None:
+            # documents written before versioning have no version field, which matches None
+            query["version"] = {"$in": [0, None]} if expected_version == 0 else expected_version
+        if not position:
+            update["$unset"] = {f"positions.{key}": "", f"unmatched_trades.{key}": ""}
+        elif pushed_lot is not None:
+            update["$set"] = {
+                f"positions.{key}": position,
+                f"unmatched_trades.{key}.method": lots["method"],
+                f"unmatched_trades.{key}.shares": lots["shares"],
+                f"unmatched_trades.{key}.cost": lots["cost"],
+            }
+            update["$push"] = {f"unmatched_trades.{key}.lots": pushed_lot}
+        else:
+            update["$set"] = {f"positions.{key}": position, f"unmatched_trades.{key}": lots}
+        return self.accounts.update_one(query, update).matched_count == 1
+
+    @timed("db_seconds", op="append_history")
+    def append_history(self, name: str, date: str, point: dict) -> None:
+        self.accounts.update_one({"_id": name}, {"$set": {f"account_history.{date}": point}})
+
+    @timed("db_seconds", op="append_history_many")
+    def append_history_many(self, date: str, points: dict[str, dict]) -> list[str]:
+        """
+        Adds one history point per account in a single unordered bulk write. Accounts that
+        already have a point for `date` are left as they are, so re-running is harmless.
+
+        Returns:
+            names whose write failed and can be retried
+        """
+        names = list(points)
+        if not names:
+            return []
+        requests = [
+            UpdateOne({"_id": name, f"account_history.{date}": {"$exists": False}},
+                      {"$set": {f"account_history.{date}": points[name]}})
+            for name in names
+        ]
+        try:
+            self.accounts.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            return [names[error["index"]] for error in e.details.get("writeErrors", [])]
+        return []
+
+    @timed("db_seconds", op="migrate_legacy")
+    def migrate_legacy(self) -> int:
+        """
+        One-time migration from the single `{"db": {name: account}}` document layout.
+        The legacy blob is kept under `migrated_db` as a backup.
+
+        Returns:
+            number of accounts migrated
+        """
+        if self.legacy is None:
+            return 0
+
+        doc = self.legacy.find_one({"db": {"$exists": True}})
+        if not doc:
+            return 0
+
+        migrated = 0
+        for name, account in doc["db"].items():
+            self.accounts.replace_one({"_id": name}, _to_document(name, account), upsert=True)
+            migrated += 1
+
+        self.legacy.update_one({"_id": doc["_id"]}, {"$rename": {"db": "migrated_db"}})
+        return migrated
@@ -0,0 +1,116 @@
+"""
+Fires many concurrent order fills at a local Mongo stand-in and checks that no fill
+is lost or double-applied.
+
+Two AccountRepository instances share the same collections to mimic two bot
+processes, so both the in-process per-account locks and the optimistic version
+checks are exercised.
+
+    python stress_fills.py --fills 500 --accounts 20
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from account_repository import AccountRepository
+from fills import AccountLocks, fill_order
+from ledger import position_totals
+from local_mongo import LocalCollection
+from order import Order
+from storage import AccountStore
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA"]
+STARTING_CASH = 1_000_000.0
+
+async def run(fills: int, accounts: int, workers: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    accounts_collection = LocalCollection("accounts")
+    meta_collection = LocalCollection("meta")
+    repositories = [
+        AccountRepository(AccountStore(accounts_collection), meta_collection, check_interval=0)
+        for _ in range(2)
+    ]
+    names = [f"account-{i}" for i in range(accounts)]
+    for name in names:
+        repositories[0].create(name, {
+            "cash": STARTING_CASH,
+            "positions": {},
+            "unmatched_trades": {},
+            "account_history": {"2024-01-01": {"value": STARTING_CASH, "return": 0}},
+        })
+
+    locks = [AccountLocks(), AccountLocks()]
+    executor = ThreadPoolExecutor(max_workers=workers)
+    loop = asyncio.get_running_loop()
+    applied = defaultdict(list)
+    statuses = defaultdict(int)
+
+    async def submit(process: int, name: str, transaction: str, order: Order):
+        async with locks[process](name):
+            status = await loop.run_in_executor(executor, fill_order, repositories[process], name, transaction, order)
+        statuses[status] += 1
+        if status == "Filled":
+            applied[name].append((transaction, order))
+
+    tasks = []
+    for _ in range(fills):
+        order = Order(
+            type="market",
+            ticker=rng.choice(TICKERS),
+            shares=rng.randint(1, 20),
+            fill_price=round(rng.uniform(10, 500), 2),
+            timestamp=datetime.now(timezone.utc),
+            status="Filled",
+        )
+        tasks.append(submit(rng.randrange(2), rng.choice(names), rng.choice(["BUY", "SELL"]), order))
+
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+
+    ok = True
+    final = AccountStore(accounts_collection).load_all()
+    for name in names:
+        cash = STARTING_CASH
+        positions = defaultdict(int)
+        for transaction, order in applied[name]:
+            shares = order.shares if transaction == "BUY" else -order.shares
+            cash -= shares * order.fill_price
+            positions[order.ticker] += shares
+        positions = {ticker: shares for ticker, shares in positions.items() if shares}
+
+        account = final[name]
+        lot_totals = {ticker: sum(shares for shares, _ in ledger["lots"]) for ticker, ledger in account["unmatched_trades"].items()}
+        checks = {
+            "cash": abs(account["cash"] - cash) < 1e-6,
+            "positions": account["positions"] == positions,
+            "lots": lot_totals == positions,
+            "ledger totals": all(position_totals(ledger)[0] == positions[ticker] for ticker, ledger in account["unmatched_trades"].items()),
+            "version": account["version"] == len(applied[name]),
+        }
+        for check, passed in checks.items():
+            if not passed:
+                ok = False
+                print(f"FAIL {name}: {check} invariant broken")
+
+    print(f"{fills} fills over {accounts} accounts in {elapsed:.3f}s ({fills / elapsed:,.0f} fills/s)")
+    print(f"statuses: {dict(statuses)}")
+    for i, repository in enumerate(repositories):
+        print(f"repository {i}: {repository.stats()}")
+    print("invariants OK" if ok else "invariants FAILED")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fills", type=int, default=500)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.fills, args.accounts, args.workers, args.seed)) else 1)
@@ -0,0 +1,138 @@
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from sectors import sectors
+
+# Yahoo symbols: letters, digits and . - = ^ (e.g. BRK-B, SHOP.TO, ES=F, ^GSPC, BTC-USD)
+TICKER_PATTERN = re.compile(r"^[A-Z0-9.\-=^]{1,15}$")
+VALID_TTL = float(os.getenv("TICKER_VALID_TTL", str(30 * 24 * 3600)))
+REJECTED_TTL = float(os.getenv("TICKER_REJECTED_TTL", str(24 * 3600)))
+
+class TickerIndex:
+    """
+    Local knowledge of which symbols exist, consulted before any upstream call.
+
+    Symbols from `sectors.py` are always known. Symbols looked up upstream are remembered
+    as validated or rejected with a TTL, optionally persisted to a Mongo collection
+    (`{_id: symbol, valid, name, expires_at}`) so restarts and other processes share them.
+    Autocomplete is served from sorted arrays of symbols and lower-cased names searched
+    with bisect.
+    """
+
+    def __init__(self, seed: dict[str, str] | None = None, valid_ttl: float = VALID_TTL,
+                 rejected_ttl: float = REJECTED_TTL):
+        self.valid_ttl = valid_ttl
+        self.rejected_ttl = rejected_ttl
+        self.collection: Collection | None = None
+        self._seed = {symbol.upper(): name for symbol, name in (seed or {}).items()}
+        self._names: dict[str, str] = dict(self._seed)
+        # symbol -> (valid, expires_at)
+        self._status: dict[str, tuple[bool, float]] = {}
+        self._symbols = sorted(self._names)
+        self._name_keys = sorted((name.lower(), symbol) for symbol, name in self._names.items())
+        self._lock = threading.Lock()
+        self.rejections_served = 0
+
+    def attach(self, collection: Collection) -> int:
+        """
+        Loads unexpired validated/rejected symbols and persists new results from now on.
+
+        Returns:
+            number of symbols loaded
+        """
+        self.collection = collection
+        now = time.time()
+        loaded = 0
+        for doc in collection.find({"expires_at": {"$gte": now}}):
+            self._remember(doc["_id"], doc["valid"], doc.get("name"), doc["expires_at"])
+            loaded += 1
+        return loaded
+
+    def _remember(self, symbol: str, valid: bool, name: str | None, expires_at: float) -> None:
+        with self._lock:
+            self._status[symbol] = (valid, expires_at)
+            if valid and symbol not in self._names:
+                self._names[symbol] = name or symbol
+                insort(self._symbols, symbol)
+                if name:
+                    insort(self._name_keys, (name.lower(), symbol))
+
+    def status(self, ticker: str) -> bool | None:
+        """
+        True if the symbol is known to exist, False if known not to, None if it has to be
+        looked up.
+        """
+        symbol = ticker.upper()
+        if not TICKER_PATTERN.match(symbol):
+            return False
+        if symbol in self._seed:
+            return True
+        entry = self._status.get(symbol)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry[0]
+
+    def is_rejected(self, ticker: str) -> bool:
+        if self.status(ticker) is False:
+            self.rejections_served += 1
+            return True
+        return False
+
+    def record(self, ticker: str, valid: bool, name: str | None = None) -> None:
+        symbol = ticker.upper()
+        if symbol in self._seed or not TICKER_PATTERN.match(symbol):
+            return
+        ttl = self.valid_ttl if valid else self.rejected_ttl
+        now = time.time()
+        entry = self._status.get(symbol)
+        if entry is not None and entry[0] == valid and entry[1] - now > ttl / 2:
+            return
+        self._remember(symbol, valid, name, now + ttl)
+        if self.collection is not None:
+            try:
+                self.collection.update_one(
+                    {"_id": symbol},
+                    {"$set": {"valid": valid, "name": name, "expires_at": now + ttl}},
+                    upsert=True,
+                )
+            except PyMongoError as e:
+                print(f"Could not persist ticker status for {symbol}: {e}")
+
+    def complete(self, prefix: str, limit: int = 25) -> list[tuple[str, str]]:
+        """
+        Returns up to `limit` (symbol, name) pairs whose symbol, then name, starts with `prefix`.
+        """
+        symbol_prefix = prefix.strip().upper()
+        name_prefix = prefix.strip().lower()
+        with self._lock:
+            matches = []
+            start = bisect_left(self._symbols, symbol_prefix)
+            for symbol in self._symbols[start:start + limit]:
+                if not symbol.startswith(symbol_prefix):
+                    break
+                matches.append(symbol)
+            if name_prefix and len(matches) < limit:
+                start = bisect_left(self._name_keys, (name_prefix,))
+                for name, symbol in self._name_keys[start:start + limit]:
+                    if not name.startswith(name_prefix) or len(matches) >= limit:
+                        break
+                    if symbol not in matches:
+                        matches.append(symbol)
+            return [(symbol, self._names[symbol]) for symbol in matches]
+
+    def stats(self) -> dict:
+        valid = sum(1 for ok, _ in self._status.values() if ok)
+        return {
+            "known": len(self._names),
+            "validated": valid,
+            "rejected": len(self._status) - valid,
+            "rejections_served": self.rejections_served,
+        }
+
+ticker_index = TickerIndex({symbol: name for sector in sectors.values() for symbol, name in sector.items()})
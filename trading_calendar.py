@@ -0,0 +1,174 @@
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import NamedTuple
+
+import pytz
+
+EASTERN = pytz.timezone("America/New_York")
+
+PRE_MARKET_OPEN = time(4, 0)
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+POST_MARKET_CLOSE = time(20, 0)
+EARLY_POST_MARKET_CLOSE = time(17, 0)
+
+CLOSED = "closed"
+PRE_MARKET = "pre"
+REGULAR = "regular"
+POST_MARKET = "post"
+
+# quote types that only trade during exchange sessions; crypto, currencies, futures etc. trade around the clock
+SESSION_ASSET_TYPES = frozenset({"EQUITY", "ETF"})
+
+# unscheduled full-day closures
+SPECIAL_CLOSURES = {
+    date(2001, 9, 11): "September 11",
+    date(2001, 9, 12): "September 11",
+    date(2001, 9, 13): "September 11",
+    date(2001, 9, 14): "September 11",
+    date(2004, 6, 11): "Reagan national day of mourning",
+    date(2007, 1, 2): "Ford national day of mourning",
+    date(2012, 10, 29): "Hurricane Sandy",
+    date(2012, 10, 30): "Hurricane Sandy",
+    date(2018, 12, 5): "Bush national day of mourning",
+    date(2025, 1, 9): "Carter national day of mourning",
+}
+
+class TradingDay(NamedTuple):
+    """
+    Session bounds of one NYSE trading day, as aware UTC datetimes.
+    """
+    day: date
+    pre_open: datetime
+    open: datetime
+    close: datetime
+    post_close: datetime
+    early_close: bool
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _easter(year: int) -> date:
+    # anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def _observed(day: date) -> date:
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+@lru_cache(maxsize=None)
+def holidays(year: int) -> dict[date, str]:
+    """
+    NYSE full-day holidays of `year` by rule, plus special closures.
+    """
+    days = {
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _last_weekday(year, 5, 0): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    # New Year's Day falling on a Saturday is not observed on the Friday before
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days[_observed(new_year)] = "New Year's Day"
+    if year >= 2022:
+        days[_observed(date(year, 6, 19))] = "Juneteenth"
+    days.update({day: name for day, name in SPECIAL_CLOSURES.items() if day.year == year})
+    return days
+
+def _early_closes(year: int, closed: dict[date, str]) -> set[date]:
+    candidates = {
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    }
+    return {day for day in candidates if day.weekday() < 5 and day not in closed}
+
+def _bound(day: date, at: time) -> datetime:
+    return EASTERN.localize(datetime.combine(day, at)).astimezone(pytz.utc)
+
+@lru_cache(maxsize=None)
+def _year(year: int) -> dict[date, TradingDay]:
+    closed = holidays(year)
+    early = _early_closes(year, closed)
+    days = {}
+    day = date(year, 1, 1)
+    while day.year == year:
+        if day.weekday() < 5 and day not in closed:
+            is_early = day in early
+            days[day] = TradingDay(
+                day=day,
+                pre_open=_bound(day, PRE_MARKET_OPEN),
+                open=_bound(day, REGULAR_OPEN),
+                close=_bound(day, EARLY_CLOSE if is_early else REGULAR_CLOSE),
+                post_close=_bound(day, EARLY_POST_MARKET_CLOSE if is_early else POST_MARKET_CLOSE),
+                early_close=is_early,
+            )
+        day += timedelta(days=1)
+    return days
+
+def trading_day(day: date) -> TradingDay | None:
+    """
+    Returns None if the exchange is closed all day. Each year is built once on first use,
+    so this is a dict lookup.
+    """
+    return _year(day.year).get(day)
+
+def trading_day_at(at: datetime) -> TradingDay | None:
+    """
+    Trading day of the New York calendar date `at` (aware) falls on.
+    """
+    return trading_day(at.astimezone(EASTERN).date())
+
+def session_at(at: datetime) -> TradingDay | None:
+    """
+    Trading day whose extended session contains `at` (aware), or None outside all sessions.
+    Sessions end by 01:00 UTC, so only the UTC date and the day before are candidates and
+    no time zone conversion is needed.
+    """
+    day = at.astimezone(timezone.utc).date()
+    for candidate in (day, day - timedelta(days=1)):
+        session = _year(candidate.year).get(candidate)
+        if session is not None and session.pre_open <= at < session.post_close:
+            return session
+    return None
+
+def session_state(at: datetime) -> str:
+    """
+    Returns CLOSED, PRE_MARKET, REGULAR or POST_MARKET for an aware timestamp.
+    """
+    day = session_at(at)
+    if day is None:
+        return CLOSED
+    if at < day.open:
+        return PRE_MARKET
+    if at < day.close:
+        return REGULAR
+    return POST_MARKET
+
+def is_open(at: datetime, extended_hours: bool = True) -> bool:
+    state = session_state(at)
+    return state == REGULAR or (extended_hours and state != CLOSED)
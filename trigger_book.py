@@ -0,0 +1,273 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+
+from instrumentation import timed
+from order import Order
+
+ORDER_TYPES = ("limit", "stop", "stop_limit")
+
+# heap sides: BELOW triggers once the price is at or below the level, ABOVE at or above it
+BELOW = 0
+ABOVE = 1
+
+def make_order(order_type: str, ticker: str, shares: int, timestamp: datetime,
+               limit_price: float | None = None, stop_price: float | None = None) -> Order:
+    """
+    Builds a resting order, validating that it has the prices its type needs.
+
+    Raises:
+        ValueError: on an unknown type, missing or non-positive prices, or non-positive shares
+    """
+    if order_type not in ORDER_TYPES:
+        raise ValueError(f"Unknown order type `{order_type}`.")
+    if shares <= 0:
+        raise ValueError("Shares must be positive.")
+    if order_type in ("limit", "stop_limit") and (limit_price is None or limit_price <= 0):
+        raise ValueError("A positive limit price is required.")
+    if order_type in ("stop", "stop_limit") and (stop_price is None or stop_price <= 0):
+        raise ValueError("A positive stop price is required.")
+    return Order(type=order_type, ticker=ticker.upper(), shares=shares, fill_price=0, timestamp=timestamp,
+                 status="Open", limit_price=limit_price if order_type != "stop" else None,
+                 stop_price=stop_price if order_type != "limit" else None)
+
+def _stage(entry: dict) -> str:
+    """
+    "stop" while a stop or untriggered stop-limit order waits for its stop price, else "limit".
+    """
+    order_type = entry["order"].type
+    if order_type == "stop" or (order_type == "stop_limit" and not entry["triggered"]):
+        return "stop"
+    return "limit"
+
+def _trigger(entry: dict, stage: str) -> tuple[int, float]:
+    order = entry["order"]
+    buy = entry["transaction"] == "BUY"
+    if stage == "limit":
+        return (BELOW if buy else ABOVE), order.limit_price
+    return (ABOVE if buy else BELOW), order.stop_price
+
+def _entry(account: str, transaction: str, order: Order, entry_id, triggered: bool = False) -> dict:
+    return {
+        "_id": entry_id,
+        "account": account,
+        "transaction": transaction,
+        "ticker": order.ticker.upper(),
+        "submitted_at": order.timestamp,
+        "triggered": triggered,
+        "order": order,
+    }
+
+class TriggerBook:
+    """
+    In-memory index of resting limit, stop and stop-limit orders.
+
+    Each ticker has two heaps keyed by trigger level: one for orders that trigger when the
+    price falls to their level (buy limits, sell stops), kept as a max-heap, and one for
+    orders that trigger when it rises to it (sell limits, buy stops), kept as a min-heap.
+    A price update only pops the orders whose level was crossed, so its cost does not
+    depend on how many orders are resting.
+
+    Removed orders are dropped lazily when they reach the top of a heap; a ticker's heaps
+    are rebuilt once most of their entries are dead.
+    """
+
+    def __init__(self):
+        self._entries: dict = {}
+        self._stages: dict = {}
+        self._heaps: dict[str, tuple[list, list]] = {}
+        self._dead: dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, entry_id) -> bool:
+        return entry_id in self._entries
+
+    def _push(self, entry: dict) -> None:
+        stage = _stage(entry)
+        side, level = _trigger(entry, stage)
+        heaps = self._heaps.setdefault(entry["ticker"], ([], []))
+        key = -level if side == BELOW else level
+        heapq.heappush(heaps[side], (key, next(self._sequence), entry["_id"], stage))
+        self._stages[entry["_id"]] = stage
+
+    def add(self, entry: dict) -> bool:
+        with self._lock:
+            if entry["_id"] in self._entries:
+                return False
+            self._entries[entry["_id"]] = entry
+            self._push(entry)
+            return True
+
+    def load(self, entries: list[dict]) -> int:
+        return sum(self.add(entry) for entry in entries)
+
+    def remove(self, entry_id) -> dict | None:
+        with self._lock:
+            entry = self._entries.pop(entry_id, None)
+            if entry is None:
+                return None
+            self._stages.pop(entry_id, None)
+            ticker = entry["ticker"]
+            self._dead[ticker] = self._dead.get(ticker, 0) + 1
+            below, above = self._heaps[ticker]
+            if self._dead[ticker] > (len(below) + len(above)) // 2:
+                self._rebuild(ticker)
+            return entry
+
+    def _rebuild(self, ticker: str) -> None:
+        below, above = self._heaps[ticker]
+        for heap in (below, above):
+            heap[:] = [item for item in heap if self._stages.get(item[2]) == item[3]]
+            heapq.heapify(heap)
+        self._dead[ticker] = 0
+        if not below and not above:
+            del self._heaps[ticker]
+
+    def tickers(self) -> list[str]:
+        with self._lock:
+            return list(self._heaps)
+
+    def ids(self) -> list:
+        with self._lock:
+            return list(self._entries)
+
+    def _pop_crossed(self, ticker: str, price: float) -> list:
+        below, above = self._heaps[ticker]
+        crossed = []
+        while below and -below[0][0] >= price:
+            crossed.append(heapq.heappop(below))
+        while above and above[0][0] <= price:
+            crossed.append(heapq.heappop(above))
+        return crossed
+
+    def on_price(self, ticker: str, price: float) -> tuple[list[dict], list[dict]]:
+        """
+        Applies one price update to a ticker's resting orders.
+
+        Triggered stop-limit orders move to their limit and are checked again at the same
+        price. Orders that fill are removed from the book.
+
+        Returns:
+            fills: entries to fill at `price`, in trigger-level then submission order
+            activated: stop-limit entries whose stop triggered and that now rest at their limit
+        """
+        ticker = ticker.upper()
+        fills = []
+        activated = []
+        with self._lock:
+            if ticker not in self._heaps:
+                return fills, activated
+            crossed = self._pop_crossed(ticker, price)
+            while crossed:
+                converted = False
+                for _, _, entry_id, stage in crossed:
+                    if self._stages.get(entry_id) != stage:
+                        # removed, or already moved on to its limit stage
+                        continue
+                    entry = self._entries[entry_id]
+                    if stage == "stop" and entry["order"].type == "stop_limit":
+                        entry["triggered"] = True
+                        self._push(entry)
+                        activated.append(entry)
+                        converted = True
+                        continue
+                    del self._entries[entry_id]
+                    del self._stages[entry_id]
+                    fills.append(entry)
+                crossed = self._pop_crossed(ticker, price) if converted else []
+            if ticker in self._heaps and not any(self._heaps[ticker]):
+                del self._heaps[ticker]
+                self._dead.pop(ticker, None)
+        # activated orders that filled straight away only need reporting once
+        filled = {entry["_id"] for entry in fills}
+        return fills, [entry for entry in activated if entry["_id"] not in filled]
+
+    def stats(self) -> dict:
+        return {"resting": len(self._entries), "tickers": len(self._heaps)}
+
+class MongoTriggerOrderStore:
+    """
+    Durable store of resting limit, stop and stop-limit orders. Entries have the same
+    shape as pending orders plus `triggered`, set once a stop-limit order's stop fires.
+    """
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("account", ASCENDING), ("submitted_at", ASCENDING)])
+        self.collection.create_index([("submitted_at", ASCENDING)])
+
+    @staticmethod
+    def _from_document(doc: dict) -> dict:
+        order = Order(**doc["order"])
+        if order.timestamp.tzinfo is None:
+            order.timestamp = order.timestamp.replace(tzinfo=timezone.utc)
+        return _entry(doc["account"], doc["transaction"], order, doc["_id"], doc.get("triggered", False))
+
+    @timed("db_seconds", op="trigger_add")
+    def add(self, account: str, transaction: str, order: Order) -> dict:
+        entry = _entry(account, transaction, order, ObjectId())
+        self.collection.insert_one({**entry, "order": order.model_dump()})
+        return entry
+
+    @timed("db_seconds", op="trigger_all")
+    def all(self) -> list[dict]:
+        return [self._from_document(doc) for doc in self.collection.find().sort("submitted_at", ASCENDING)]
+
+    @timed("db_seconds", op="trigger_by_ids")
+    def by_ids(self, entry_ids) -> list[dict]:
+        if not entry_ids:
+            return []
+        cursor = self.collection.find({"_id": {"$in": list(entry_ids)}}).sort("submitted_at", ASCENDING)
+        return [self._from_document(doc) for doc in cursor]
+
+    @timed("db_seconds", op="trigger_for_account")
+    def for_account(self, account: str) -> list[dict]:
+        cursor = self.collection.find({"account": account}).sort("submitted_at", ASCENDING)
+        return [self._from_document(doc) for doc in cursor]
+
+    @timed("db_seconds", op="trigger_ids")
+    def ids(self) -> set:
+        return {doc["_id"] for doc in self.collection.find({}, {"_id": 1})}
+
+    @timed("db_seconds", op="trigger_tickers")
+    def tickers(self) -> list[str]:
+        return self.collection.distinct("ticker")
+
+    @timed("db_seconds", op="trigger_claim")
+    def claim(self, entry_id, account: str | None = None) -> bool:
+        """
+        Atomically removes one order (optionally only if it belongs to `account`); only
+        the caller that gets True may fill or cancel it.
+        """
+        query = {"_id": entry_id}
+        if account is not None:
+            query["account"] = account
+        return self.collection.delete_one(query).deleted_count == 1
+
+    @timed("db_seconds", op="trigger_restore")
+    def restore(self, entry: dict) -> None:
+        """
+        Puts back a claimed order that could not be filled, under the same id.
+        """
+        doc = _entry(entry["account"], entry["transaction"], entry["order"], entry["_id"], entry["triggered"])
+        self.collection.insert_one({**doc, "order": entry["order"].model_dump()})
+
+    @timed("db_seconds", op="trigger_mark_triggered")
+    def mark_triggered(self, entry_ids: list) -> None:
+        if entry_ids:
+            self.collection.update_many({"_id": {"$in": list(entry_ids)}}, {"$set": {"triggered": True}})
+
+    @timed("db_seconds", op="trigger_count")
+    def count(self) -> int:
+        return self.collection.count_documents({})
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import data
+from lazy_imports import lazy_import
+from ledger import position_totals
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+def _prices(asset_infos: pd.DataFrame, tickers: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    infos = asset_infos.reindex(tickers)
+    current = infos["price"].to_numpy(dtype=float)
+    prev = infos["prev_close"].to_numpy(dtype=float)
+    current = np.where(np.isnan(current), prev, current)
+    prev = np.where(np.isnan(prev), current, prev)
+    return current, prev
+
+def value_accounts(accounts: dict, asset_infos: pd.DataFrame | None = None,
+                   include_positions: bool = True) -> dict[str, tuple[dict, dict]]:
+    """
+    Values every account in one pass: the union of held tickers is priced with a single
+    batched fetch and all positions are valued together over an accounts x tickers matrix.
+
+    Returns:
+        {account_name: (positions_info, account_info)} in the same shape as
+        evaluate_account_positions; positions_info is empty if `include_positions` is False
+    """
+    names = list(accounts)
+    tickers = sorted({ticker.upper() for account in accounts.values() for ticker in account["unmatched_trades"]})
+    columns = {ticker: i for i, ticker in enumerate(tickers)}
+
+    shares = np.zeros((len(names), len(tickers)))
+    cost = np.zeros((len(names), len(tickers)))
+    for row, name in enumerate(names):
+        for ticker, ledger in accounts[name]["unmatched_trades"].items():
+            total_shares, total_cost = position_totals(ledger)
+            column = columns[ticker.upper()]
+            shares[row, column] += total_shares
+            cost[row, column] += total_cost
+
+    if asset_infos is None:
+        asset_infos = data.get_asset_infos(tickers)
+    current, prev = _prices(asset_infos, tickers)
+
+    # a ticker without a price only makes the accounts that hold it NaN, not every row
+    held = shares != 0
+    values = np.where(held, shares * current, 0.0)
+    prev_values = np.where(held, shares * prev, 0.0)
+    invested = values.sum(axis=1)
+    cash = np.array([accounts[name]["cash"] for name in names], dtype=float)
+    previous_account_values = np.array(
+        [list(accounts[name]["account_history"].values())[-1]["value"] for name in names], dtype=float
+    )
+    account_values = invested + cash
+    account_day_pnl = account_values - previous_account_values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        account_day_change = account_day_pnl / previous_account_values * 100
+        position_day_change = (values - prev_values) / prev_values * 100
+        cost_basis = cost / shares
+
+    results = {}
+    for row, name in enumerate(names):
+        positions_info = {}
+        if include_positions:
+            for ticker in accounts[name]["unmatched_trades"]:
+                column = columns[ticker.upper()]
+                positions_info[ticker] = {
+                    "shares": int(shares[row, column]),
+                    "price": float(current[column]),
+                    "cost_basis": float(cost_basis[row, column]),
+                    "total_value": float(values[row, column]),
+                    "pnl": float(values[row, column] - cost[row, column]),
+                    "day_pnl": float(values[row, column] - prev_values[row, column]),
+                    "day_change": float(position_day_change[row, column]),
+                }
+
+        account_info = {
+            "cash": accounts[name]["cash"],
+            "invested": float(invested[row]),
+            "account_value": float(account_values[row]),
+            "day_pnl": float(account_day_pnl[row]),
+            "day_change": float(account_day_change[row]),
+        }
+        results[name] = (positions_info, account_info)
+    return results
+
+def value_account(account: dict) -> tuple[dict, dict]:
+    return value_accounts({"account": account})["account"]